@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of collecting the pylint checks of a large tree of files.
+
+Generates a tree of small modules, with a tenth of them in ignored
+directories, and reports how long ``pytest --pylint --collect-only`` takes
+per 10000 files::
+
+    python benchmarks/collection.py --files 50000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from os.path import join
+
+FILES_PER_DIR = 100
+
+
+def make_tree(root, files):
+    """Write ``files`` modules under ``root``, a tenth in ignored directories"""
+    for index in range(files):
+        directory = f"pkg{index // FILES_PER_DIR}"
+        if index % 10 == 0:
+            directory = join(directory, "build", "generated")
+        directory = join(root, directory)
+        os.makedirs(directory, exist_ok=True)
+        with open(join(directory, f"mod{index}.py"), "w", encoding="utf-8") as _file:
+            _file.write(f'"""Module {index}."""\n')
+
+
+def collect(root):
+    """Give the seconds taken to collect the pylint checks under ``root``"""
+    start = time.perf_counter()
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "pytest",
+            "--pylint",
+            "--collect-only",
+            "-q",
+            "-p",
+            "no:cacheprovider",
+            "--pylint-ignore=build",
+            "--pylint-ignore-patterns=.*_pb2.py,.*/migrations/",
+            root,
+        ],
+        cwd=root,
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        make_tree(root, args.files)
+        # The rootdir needs a configuration file not to be looked for above
+        with open(join(root, "pytest.ini"), "w", encoding="utf-8") as _file:
+            _file.write("[pytest]\n")
+        best = min(collect(root) for _ in range(args.repeat))
+
+    print(
+        f"collected {args.files} files in {best:.2f}s, "
+        f"{best * 10000 / args.files:.2f}s per 10000 files"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Baseline of accepted pylint messages, so only new ones fail."""
+import json
+import re
+from collections import Counter
+from hashlib import sha1
+
+# Numbers in messages often are line numbers or counts that drift
+NUMBER = re.compile(r"\d+")
+
+
+def get_fingerprint(message, lines):
+    """
+    Give a fingerprint of ``message`` that doesn't depend on its line
+    number, from its object, its text and the source line it is on.
+
+    :param list lines: the source lines of the file of the message
+    """
+    line = message.line or 0
+    source = lines[line - 1].strip() if 0 < line <= len(lines) else ""
+    text = NUMBER.sub("0", message.msg or "")
+    return sha1(f"{message.obj}\0{text}\0{source}".encode()).hexdigest()[:16]
+
+
+def read_lines(path):
+    """Give the source lines of the file at ``path``, none if it is missing"""
+    try:
+        with open(path, "rb") as f_p:
+            return f_p.read().decode("utf-8", "replace").splitlines()
+    except OSError:
+        return []
+
+
+class Baseline:
+    """
+    Accepted messages of each file, loaded once and indexed by file, symbol
+    and fingerprint so checking a message takes a dictionary lookup.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Accepted count and example text of each message, by file, then by
+        # symbol and fingerprint
+        self.files = {}
+
+    def load(self):
+        """Load the baseline file"""
+        with open(self.path, encoding="utf-8") as _file:
+            content = json.load(_file)
+        for rel_path, entries in content["files"].items():
+            self.files[rel_path] = {
+                (entry["symbol"], entry["fingerprint"]): entry for entry in entries
+            }
+
+    def get_new(self, rel_path, messages, lines):
+        """Give the ``messages`` of a file that aren't in the baseline"""
+        entries = self.files.get(rel_path, {})
+        seen = Counter()
+        new = []
+        for message in messages:
+            key = (message.symbol, get_fingerprint(message, lines))
+            seen[key] += 1
+            entry = entries.get(key)
+            if entry is None or seen[key] > entry["count"]:
+                new.append(message)
+        return new
+
+    def update(self, rel_path, messages, lines):
+        """Accept the ``messages`` of a file instead of its earlier ones"""
+        entries = {}
+        for message in messages:
+            fingerprint = get_fingerprint(message, lines)
+            entry = entries.setdefault(
+                (message.symbol, fingerprint),
+                {
+                    "symbol": message.symbol,
+                    "fingerprint": fingerprint,
+                    "count": 0,
+                    "msg": message.msg,
+                },
+            )
+            entry["count"] += 1
+        if entries:
+            self.files[rel_path] = entries
+        else:
+            self.files.pop(rel_path, None)
+
+    def save(self):
+        """Write the baseline file"""
+        files = {
+            rel_path: [entries[key] for key in sorted(entries)]
+            for rel_path, entries in sorted(self.files.items())
+        }
+        with open(self.path, "w", encoding="utf-8") as _file:
+            json.dump({"files": files}, _file, indent=1, sort_keys=True)
+            _file.write("\n")
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Lint daemon keeping pylint and astroid state warm between pytest runs.
+
+The daemon listens on a Unix socket and answers one JSON request per
+connection. It exits when it is idle for too long, when asked to, or when a
+request comes from a different configuration or set of versions, so the
+client can start a fresh one.
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from hashlib import sha1
+from os.path import getmtime, join
+
+# Unix socket paths are limited to a bit over 100 bytes, leave some room for
+# the suffix of the path the socket is bound to first
+MAX_SOCKET_PATH = 90
+IDLE_TIMEOUT = 30 * 60
+START_TIMEOUT = 30
+
+
+def get_socket_path(cache_dir):
+    """Give the path of the socket of the daemon serving ``cache_dir``"""
+    path = join(str(cache_dir), "daemon.sock")
+    if len(path) > MAX_SOCKET_PATH:
+        digest = sha1(path.encode()).hexdigest()[:16]
+        path = join(tempfile.gettempdir(), f"pytest-pylint-{digest}.sock")
+    return path
+
+
+def _send(conn, payload):
+    conn.sendall(json.dumps(payload).encode() + b"\n")
+
+
+def _receive(conn):
+    with conn.makefile("rb") as stream:
+        line = stream.readline()
+    return json.loads(line) if line else None
+
+
+def _refresh_astroid(mtimes):
+    """
+    Drop the astroid modules built from files that changed since they were
+    seen last, along with the inference caches that may refer to them.
+
+    :param dict mtimes: modification time of the files of cached modules
+    """
+    # pylint: disable=import-outside-toplevel
+    from astroid import MANAGER
+
+    stale = False
+    for name, module in list(MANAGER.astroid_cache.items()):
+        path = getattr(module, "file", None)
+        if not path:
+            continue
+        try:
+            mtime = getmtime(path)
+        except OSError:
+            mtime = None
+        if mtimes.setdefault(path, mtime) != mtime:
+            del MANAGER.astroid_cache[name]
+            mtimes[path] = mtime
+            stale = True
+
+    # Files may have been added or removed, so module lookups start over
+    MANAGER._mod_file_cache.clear()  # pylint: disable=protected-access
+    if stale:
+        try:
+            from astroid.context import _invalidate_cache
+            from astroid.inference_tip import clear_inference_tip_cache
+            from pylint.checkers.clear_lru_cache import clear_lru_caches
+        except ImportError:
+            # Without the finer grained caches of recent versions all that
+            # stays warm is the process itself.
+            MANAGER.clear_cache()
+            mtimes.clear()
+        else:
+            _invalidate_cache()
+            clear_inference_tip_cache()
+            clear_lru_caches()
+
+
+def serve(socket_path, fingerprint):
+    """Answer lint requests on ``socket_path`` until told to stop"""
+    # pylint: disable=import-outside-toplevel
+    from .module_cache import ModuleCache
+    from .pool import lint_files
+
+    os.umask(0o077)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Only show up at socket_path once connections are accepted
+    bind_path = f"{socket_path}.{os.getpid()}"
+    server.bind(bind_path)
+    server.listen()
+    os.replace(bind_path, socket_path)
+    server.settimeout(IDLE_TIMEOUT)
+
+    mtimes = {}
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                return
+            with conn:
+                conn.settimeout(None)
+                request = _receive(conn)
+                if not request or request.get("stop"):
+                    return
+                if request["fingerprint"] != fingerprint:
+                    _send(conn, {"restart": True})
+                    return
+                os.chdir(request["cwd"])
+                _refresh_astroid(mtimes)
+                options = request["options"]
+                if options.get("module_cache") is not None:
+                    options["module_cache"] = ModuleCache(*options["module_cache"])
+                try:
+                    results = lint_files(request["files"], **options)
+                except Exception as exc:  # pylint: disable=broad-except
+                    _send(conn, {"error": f"{type(exc).__name__}: {exc}"})
+                else:
+                    _send(conn, {"results": results})
+                # Remember when the modules built for this request were read
+                _refresh_astroid(mtimes)
+    finally:
+        server.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def _request(socket_path, payload):
+    """Send ``payload`` to the daemon, ``None`` if it isn't running"""
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except OSError:
+        client.close()
+        return None
+    with client:
+        _send(client, payload)
+        return _receive(client)
+
+
+def _start(socket_path, fingerprint):
+    """Start a daemon and wait for it to listen"""
+    # pylint: disable=consider-using-with
+    subprocess.Popen(
+        [sys.executable, "-m", "pytest_pylint.daemon", socket_path, fingerprint],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if os.path.exists(socket_path):
+            return
+        time.sleep(0.05)
+    raise RuntimeError(f"pylint daemon didn't start listening on {socket_path}")
+
+
+def lint_with_daemon(socket_path, fingerprint, file_paths, lint_options):
+    """
+    Lint ``file_paths`` with the daemon listening on ``socket_path``,
+    starting it first if it isn't running or was started for another
+    ``fingerprint``.
+
+    :param dict lint_options: keyword arguments of
+        :func:`pytest_pylint.pool.lint_files`
+
+    :returns: the results of :func:`pytest_pylint.pool.lint_files`
+    """
+    request = {
+        "fingerprint": fingerprint,
+        "cwd": os.getcwd(),
+        "files": list(file_paths),
+        "options": dict(lint_options),
+    }
+    module_cache = lint_options.get("module_cache")
+    if module_cache is not None:
+        request["options"]["module_cache"] = [
+            module_cache.directory,
+            module_cache.max_size,
+        ]
+    response = _request(socket_path, request)
+    if response is None or response.get("restart"):
+        # Wait for an outdated daemon to clean up after itself
+        deadline = time.monotonic() + START_TIMEOUT
+        while os.path.exists(socket_path) and response is not None:
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+        if os.path.exists(socket_path):
+            # Nothing listens on a socket left behind by a killed daemon
+            os.unlink(socket_path)
+        _start(socket_path, fingerprint)
+        response = _request(socket_path, request)
+
+    if response is None or "error" in response:
+        error = (response or {}).get("error", "no response")
+        raise RuntimeError(f"pylint daemon failed: {error}")
+    return response["results"]
+
+
+def stop_daemon(socket_path):
+    """Ask the daemon listening on ``socket_path`` to exit, if there is one"""
+    _request(socket_path, {"stop": True})
+
+
+if __name__ == "__main__":
+    serve(*sys.argv[1:3])
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Lint results shared between the pytest-xdist workers of a test run."""
+import json
+from os import replace
+from os.path import isdir, join
+
+try:
+    import fcntl
+except ImportError:
+    # File locks are only used on Unix
+    fcntl = None
+
+
+class ResultExchange:
+    """
+    Lint results each pytest-xdist worker of a test run shares with the
+    others, as JSON files in the directory at ``path`` they all see.
+
+    A worker holds a lock from the start of its session until it shared
+    everything, so the others can wait for its results and notice if it
+    stopped without sharing them.
+    """
+
+    def __init__(self, path, name):
+        self.path = path
+        self.name = name
+        self.lock = None
+
+    @staticmethod
+    def is_supported(path):
+        """Tell whether results can be exchanged through ``path`` here"""
+        return fcntl is not None and path is not None and isdir(path)
+
+    def _open_lock(self, name):
+        return open(join(self.path, f"{name}.lock"), "ab")
+
+    def acquire(self):
+        """Hold the lock of this worker until :meth:`release`"""
+        self.lock = self._open_lock(self.name)
+        fcntl.flock(self.lock, fcntl.LOCK_EX)
+
+    def release(self):
+        """Let the other workers read what this one shared"""
+        if self.lock is not None:
+            self.lock.close()
+            self.lock = None
+
+    def share(self, key, results):
+        """Share the JSON serializable ``results`` under ``key``"""
+        path = join(self.path, f"{self.name}-{key}.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as _file:
+            json.dump(results, _file)
+        replace(f"{path}.tmp", path)
+
+    def get(self, name, key):
+        """
+        Wait for worker ``name`` to be done sharing and give its results of
+        ``key``, ``None`` if it stopped without sharing them.
+        """
+        with self._open_lock(name) as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH)
+        try:
+            with open(join(self.path, f"{name}-{key}.json"), encoding="utf-8") as _file:
+                return json.load(_file)
+        except FileNotFoundError:
+            return None
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""On-disk cache of the astroid trees built from source files."""
+import os
+import pickle
+import sys
+from hashlib import sha1
+from os.path import abspath, join
+from types import SimpleNamespace
+
+
+class ModuleCache:
+    """
+    Cache of the trees astroid builds from source files, kept in
+    ``directory`` and trimmed to ``max_size`` bytes by evicting the least
+    recently used ones.
+
+    Trees are stored before astroid transforms them, since transforms leave
+    closures behind that can't be pickled, so loading a tree still runs the
+    transforms and the result is the same as building it. Used as a context
+    manager around linting.
+    """
+
+    def __init__(self, directory, max_size):
+        self.directory = str(directory)
+        self.max_size = max_size
+        self.data_build = None
+
+    @staticmethod
+    def is_supported():
+        """
+        Tell whether astroid builds trees the way the cache hooks into, as it
+        does from astroid 4 on
+        """
+        # pylint: disable=import-outside-toplevel,protected-access
+        from astroid import __version__
+        from astroid.builder import AstroidBuilder
+
+        major = __version__.split(".", 1)[0]
+        return (
+            major.isdigit()
+            and int(major) >= 4
+            and hasattr(AstroidBuilder, "_data_build")
+        )
+
+    def __enter__(self):
+        # pylint: disable=import-outside-toplevel,protected-access
+        from astroid.builder import AstroidBuilder
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.data_build = AstroidBuilder._data_build
+
+        def _data_build(builder, data, modname, path):
+            return self.build(builder, data, modname, path)
+
+        AstroidBuilder._data_build = _data_build
+        return self
+
+    def __exit__(self, *exc_info):
+        # pylint: disable=import-outside-toplevel,protected-access
+        from astroid.builder import AstroidBuilder
+
+        AstroidBuilder._data_build = self.data_build
+        self.data_build = None
+        self.evict()
+
+    def get_key(self, data, modname, path):
+        """Give the key of the tree built from ``data``"""
+        from astroid import __version__  # pylint: disable=import-outside-toplevel
+
+        key = sha1(
+            f"{__version__}\0{sys.version}\0{modname}\0{abspath(path)}\0".encode()
+        )
+        key.update(data.encode("utf-8", "surrogateescape"))
+        return key.hexdigest()
+
+    def build(self, builder, data, modname, path):
+        """
+        Load the tree of a module from the cache, or build and store it.
+
+        :returns: the module and what astroid needs of the tree rebuilder to
+            finish building it
+        """
+        if path is None:
+            return self.data_build(builder, data, modname, path)
+
+        cache_path = join(self.directory, f"{self.get_key(data, modname, path)}.pickle")
+        cached = self.load(cache_path)
+        if cached is not None:
+            return cached
+
+        module, rebuilder = self.data_build(builder, data, modname, path)
+        # pylint: disable=protected-access
+        self.store(
+            cache_path, module, rebuilder._import_from_nodes, rebuilder._delayed_assattr
+        )
+        return module, rebuilder
+
+    def load(self, cache_path):
+        """Load a tree, ``None`` if it is missing or can't be loaded"""
+        try:
+            with open(cache_path, "rb") as cache_file:
+                module, import_from_nodes, delayed_assattr = pickle.load(cache_file)
+            # The modification time tells which trees were used last
+            os.utime(cache_path)
+        except Exception:  # pylint: disable=broad-except
+            return None
+        rebuilder = SimpleNamespace(
+            _import_from_nodes=import_from_nodes, _delayed_assattr=delayed_assattr
+        )
+        return module, rebuilder
+
+    def store(self, cache_path, module, import_from_nodes, delayed_assattr):
+        """Store a tree, unless it can't be pickled"""
+        # The names declared global are views of the rebuilder's dictionaries
+        import_from_nodes = [
+            (node, tuple(global_names)) for node, global_names in import_from_nodes
+        ]
+        temp_path = f"{cache_path}.{os.getpid()}"
+        try:
+            with open(temp_path, "wb") as cache_file:
+                pickle.dump(
+                    (module, import_from_nodes, delayed_assattr),
+                    cache_file,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(temp_path, cache_path)
+        except Exception:  # pylint: disable=broad-except
+            # Very deeply nested trees exceed the recursion limit
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def evict(self):
+        """Remove the least recently used trees until the cache fits"""
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                # Another process evicted it already
+                pass
+            size -= entry_size
@@ -3,33 +3,61 @@
 pytest plugins. Both pylint wrapper and PylintPlugin
 """
 
+# The plugin is loaded by every pytest run, so pylint, astroid and tomllib are
+# only imported once PylintPlugin is registered and actually needs them.
+# pylint: disable=import-outside-toplevel,too-many-lines
 
+import json
+import socket
 import sys
+from argparse import ArgumentTypeError
 from collections import defaultdict
 from configparser import ConfigParser, NoOptionError, NoSectionError
-from os import getcwd, makedirs, sep
-from os.path import dirname, exists, getmtime, join
+from contextlib import nullcontext
+from hashlib import sha1
+from os import cpu_count, getcwd, remove, sep
+from os.path import abspath, dirname, exists, join
 from pathlib import Path
+from subprocess import CalledProcessError
 
 import pytest
-from pylint import config as pylint_config
-from pylint import lint
 
-from .pylint_util import ProgrammaticReporter
-from .util import PyLintException, get_rel_path, should_include_file
-
-if sys.version_info >= (3, 11):
-    import tomllib
-else:
-    # pylint: disable=import-error
-    import tomli as tomllib
-
-HISTKEY = "pylint/mtimes"
-PYLINT_CONFIG_CACHE_KEY = "pylintrc"
+from .util import (
+    FileFilter,
+    LintMessage,
+    PyLintException,
+    get_changed_files,
+    get_dependents,
+    get_file_hash,
+    get_imported_modules,
+    get_rel_path,
+    get_shard,
+    schedule_batches,
+)
+
+# Files whose pylint check failed when it last ran
+FAILURES_KEY = "pylint/failures"
+# The pylint configuration parsed on the last run
+CONFIG_KEY = "pylint/config"
 FILL_CHARS = 80
+# Lint cost estimate for files that weren't timed yet
+DEFAULT_SECONDS_PER_BYTE = 1e-5
+# Upper bound of the estimated cost of a batch of small files
+MAX_BATCH_COST = 1.0
 MARKER = "pylint"
 
 
+def _parse_shard(value):
+    """Parse a ``--pylint-shard`` value into the shard index and count"""
+    try:
+        index, count = map(int, value.split("/"))
+    except ValueError:
+        index = count = 0
+    if not 1 <= index <= count:
+        raise ArgumentTypeError(f"expected i/n with 1 <= i <= n, got {value!r}")
+    return index, count
+
+
 def pytest_addoption(parser):
     """Add all our command line options"""
     group = parser.getgroup("pylint")
@@ -42,6 +70,13 @@ def pytest_addoption(parser):
         default=False,
         help="disable running pylint ",
     )
+    group.addoption(
+        "--pylint-only",
+        action="store_true",
+        default=False,
+        help="Only run the pylint checks, without collecting or importing "
+        "test modules, implies --pylint",
+    )
 
     group.addoption(
         "--pylint-rcfile", default=None, help="Location of RC file if not pylintrc"
@@ -57,11 +92,137 @@ def pytest_addoption(parser):
         default=None,
         help="Specify number of processes to use for pylint",
     )
+    group.addoption(
+        "--pylint-changed-since",
+        default=None,
+        metavar="REF",
+        help="Only lint files that differ from this git reference or are "
+        "untracked, others are skipped",
+    )
+    group.addoption(
+        "--pylint-changed-dependents",
+        action="store_true",
+        default=False,
+        help="With --pylint-changed-since, also lint the files importing the "
+        "changed files",
+    )
+    group.addoption(
+        "--pylint-shard",
+        type=_parse_shard,
+        default=None,
+        metavar="I/N",
+        help="Only lint and report the I-th of N shards of the files, to "
+        "split linting between CI nodes",
+    )
+    group.addoption(
+        "--pylint-granularity",
+        choices=("file", "package"),
+        default="file",
+        help="Run a pylint check per file, or per package checking all its "
+        "files at once to cut per-item overhead (default: file)",
+    )
+    group.addoption(
+        "--pylint-background",
+        action="store_true",
+        default=False,
+        help="Lint in worker processes while the tests run, using "
+        "--pylint-jobs processes or one per CPU",
+    )
+    group.addoption(
+        "--pylint-pool",
+        action="store_true",
+        default=False,
+        help="Lint with a process pool managed by the plugin, using "
+        "--pylint-jobs processes or one per CPU, instead of pylint's own",
+    )
+    group.addoption(
+        "--pylint-files-per-worker",
+        type=int,
+        default=None,
+        help="Replace a lint worker process with a fresh one after it linted "
+        "this many files, implies --pylint-pool",
+    )
+    group.addoption(
+        "--pylint-max-memory",
+        type=int,
+        default=None,
+        help="Replace a lint worker process with a fresh one once its memory "
+        "grew by this many megabytes, implies --pylint-pool",
+    )
+    group.addoption(
+        "--pylint-daemon",
+        action="store_true",
+        default=False,
+        help="Lint with a daemon that keeps pylint and astroid state warm "
+        "between runs",
+    )
+    group.addoption(
+        "--pylint-astroid-cache-size",
+        type=int,
+        default=0,
+        help="Megabytes of astroid trees kept in the pytest cache directory "
+        "to skip parsing unchanged modules, disabled by default",
+    )
+    group.addoption(
+        "--pylint-durations",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Show the N slowest files to lint and pylint checkers (0 for all)",
+    )
+    group.addoption(
+        "--pylint-durations-json",
+        default=None,
+        metavar="PATH",
+        help="Write the time spent linting each file and in each pylint "
+        "checker to a JSON file",
+    )
+    group.addoption(
+        "--pylint-profile",
+        default=None,
+        metavar="PATH",
+        help="Profile linting, in every process that lints, into a pstats file",
+    )
+    group.addoption(
+        "--pylint-profile-collapsed",
+        default=None,
+        metavar="PATH",
+        help="With --pylint-profile, also write the profile as collapsed stacks "
+        "for flame graphs",
+    )
     group.addoption(
         "--pylint-output-file",
         default=None,
         help="Path to a file where Pylint report will be printed to.",
     )
+    group.addoption(
+        "--pylint-output-format",
+        choices=("text", "jsonl", "sarif"),
+        default="text",
+        help="Format of the --pylint-output-file report: pylint's parseable "
+        "text, JSON Lines or SARIF (default: text)",
+    )
+    group.addoption(
+        "--pylint-baseline",
+        default=None,
+        metavar="PATH",
+        help="Only fail on pylint messages that aren't in this baseline file",
+    )
+    group.addoption(
+        "--pylint-baseline-update",
+        action="store_true",
+        default=False,
+        help="Accept the current pylint messages of the files checked into "
+        "the --pylint-baseline file",
+    )
+    group.addoption(
+        "--pylint-incremental-duplicates",
+        action="store_true",
+        default=False,
+        help="Look for duplicate code with an index kept between runs, only "
+        "comparing the files that changed instead of running pylint's "
+        "similarities checker on all of them",
+    )
     group.addoption(
         "--pylint-ignore", default=None, help="Files/directories that will be ignored"
     )
@@ -79,9 +240,13 @@ def pytest_configure(config):
     :param _pytest.config.Config config: pytest config object
     """
     config.addinivalue_line("markers", f"{MARKER}: Tests which run pylint.")
+    if config.option.pylint_only:
+        config.option.pylint = True
     if config.option.pylint and not config.option.no_pylint:
         pylint_plugin = PylintPlugin(config)
         config.pluginmanager.register(pylint_plugin)
+        if config.option.pylint_only:
+            config.pluginmanager.register(PylintOnlyPlugin(pylint_plugin))
 
 
 class PylintPlugin:
@@ -92,20 +257,82 @@ class PylintPlugin:
     # pylint: disable=too-many-instance-attributes
     def __init__(self, config):
         if hasattr(config, "cache"):
-            self.mtimes = config.cache.get(HISTKEY, {})
+            from .result_store import ResultStore
+
+            self.results = ResultStore(
+                join(config.cache.mkdir("pylint"), "results.sqlite")
+            )
+            self.failures = set(config.cache.get(FAILURES_KEY, []))
         else:
-            self.mtimes = {}
+            self.results = None
+            self.failures = set()
+        # Whether the pylint check of each file failed in this session
+        self.outcomes = {}
+        # Under pytest-xdist every worker collects everything, so each of
+        # them lints a share of the files for all the others and the
+        # controller merges their results into the cache.
+        self.xdist_worker = hasattr(config, "workerinput")
+        # The directory the workers share lint results through
+        self.exchange_dir = None
+        self.exchange = None
+        # The files and message ids each share of the linting covers, and
+        # what each worker shared, keyed by worker id and kind of share
+        self.shared_work = {}
+        self.shared_results = {}
+        # The shares each file's results are in, by relative path
+        self.shared_sources = {}
+        self.config_fingerprint = None
+        # Lint results to store per file, keyed by relative path. Each entry
+        # holds the mtime and content hash of the file and its serialized
+        # messages
+        self.new_results = {}
+        self.removed_results = set()
 
         self.pylint_files = set()
+        self.collected_files = {}
         self.pylint_messages = defaultdict(list)
+        self.durations = {}
         self.pylint_config = None
         self.pylintrc_file = None
         self.pylint_ignore = []
         self.pylint_ignore_patterns = []
+        self.file_filter = None
         self.pylint_msg_template = None
+        self.lint_pool = None
+        self.module_cache = None
+        self.changed_files = None
+        self.other_shards = set()
+        self.time_checkers = False
+        self.checker_durations = defaultdict(float)
+        self.profile = None
+        self.message_categories = None
+        self.baseline = None
+        self.baseline_update = False
+        self.root_path = None
+        self.lazy_files = {}
+        self.similarity = None
+        # Duplicate-code messages of each file found with the index
+        self.duplicates = {}
+        self.config_digest = None
+        # Message states of each pylint configuration digest, see
+        # pytest_pylint.pylint_util.get_message_states
+        self.message_states = {}
+        # Ids of the messages to lint unchanged files for again, by relative
+        # path, when only their configuration changed
+        self.stale_messages = {}
+        # Ids of the messages linted for in a separate pass over all the files,
+        # and left out when linting them in parts
+        self.close_messages = ()
+        # Files the separate pass still has to lint, by relative path, when
+        # it waits for a check that may pass
+        self.close_files = {}
+        self.error_types = None
 
     def pytest_configure(self, config):
         """Configure pytest after it is already enabled"""
+        from pylint import config as pylint_config
+
+        from .rcfile import get_versions
 
         # Find pylintrc to check ignore list
         if config.option.pylint_rcfile:
@@ -119,28 +346,45 @@ class PylintPlugin:
 
         # Try getting ignores from pylintrc since we use pytest
         # collection methods and not pylint's internal mechanism
+        parsed = {"digest": "", "plugins": []}
         if pylintrc_file and exists(pylintrc_file):
             self.pylintrc_file = pylintrc_file
-
-            # Check if pylint config has a different filename or date
-            # and invalidate the cache if it has changed.
-            pylint_mtime = getmtime(pylintrc_file)
-            cache_key = PYLINT_CONFIG_CACHE_KEY + (
-                pylintrc_file.name if isinstance(pylintrc_file, Path) else pylintrc_file
+            parsed = self._load_config(config, pylintrc_file)
+        versions_hash = sha1(get_versions(parsed["plugins"]).encode())
+
+        incremental_duplicates = config.option.pylint_incremental_duplicates and (
+            hasattr(config, "cache")
+        )
+        if incremental_duplicates:
+            from .similarity import SimilarityIndex
+
+            if not SimilarityIndex.is_supported():
+                raise pytest.UsageError(
+                    "--pylint-incremental-duplicates needs pylint 3 or later"
+                )
+            # Results then never have duplicate-code messages
+            versions_hash.update(b"\0incremental-duplicates")
+
+        # Cached results are only valid for the versions they were produced
+        # with. Their configuration is compared message by message instead.
+        self.config_digest = parsed["digest"]
+        self.config_fingerprint = sha1(
+            f"{versions_hash.hexdigest()}\0{self.config_digest}".encode()
+        ).hexdigest()
+        if self.results is not None:
+            self.results.validate(versions_hash.hexdigest())
+
+        if incremental_duplicates:
+            from .similarity import SimilarityIndex, get_similarity_options
+
+            self.similarity = SimilarityIndex(
+                join(config.cache.mkdir("pylint"), "similarity.sqlite"),
+                get_similarity_options(self.pylint_config),
             )
-            cache_value = self.mtimes.get(cache_key)
-            if cache_value is None or cache_value < pylint_mtime:
-                self.mtimes = {}
-            self.mtimes[cache_key] = pylint_mtime
+            self.similarity.validate(self.config_fingerprint)
 
-            if (
-                (pylintrc_file.suffix == ".toml")
-                if isinstance(pylintrc_file, Path)
-                else pylintrc_file.endswith(".toml")
-            ):
-                self._load_pyproject_toml(pylintrc_file)
-            else:
-                self._load_rc_file(pylintrc_file)
+        self._configure_linting(config)
+        self._configure_baseline(config)
 
         # Command line arguments take presedence over rcfile ones if set
         if config.option.pylint_ignore is not None:
@@ -149,10 +393,127 @@ class PylintPlugin:
             self.pylint_ignore_patterns = config.option.pylint_ignore_patterns.split(
                 ","
             )
+        self.file_filter = FileFilter(self.pylint_ignore, self.pylint_ignore_patterns)
+
+    def _configure_linting(self, config):
+        """Set up the caches, instrumentation and file selection asked for"""
+        self.error_types = config.option.pylint_error_types
+        # Other messages don't change the outcome, but are all written out
+        if config.option.pylint_output_file is None:
+            self.message_categories = "".join(
+                sorted(set(config.option.pylint_error_types))
+            )
 
-    def _load_rc_file(self, pylintrc_file):
-        self.pylint_config = ConfigParser()
-        self.pylint_config.read(pylintrc_file)
+        if config.option.pylint_astroid_cache_size and hasattr(config, "cache"):
+            from .module_cache import ModuleCache
+
+            if ModuleCache.is_supported():
+                self.module_cache = ModuleCache(
+                    join(config.cache.mkdir("pylint"), "astroid"),
+                    config.option.pylint_astroid_cache_size * 2**20,
+                )
+            else:
+                config.issue_config_time_warning(
+                    pytest.PytestConfigWarning(
+                        "--pylint-astroid-cache-size needs astroid 4 or later, "
+                        "linting without the astroid cache"
+                    ),
+                    stacklevel=2,
+                )
+
+        self.time_checkers = (
+            config.option.pylint_durations is not None
+            or config.option.pylint_durations_json is not None
+        )
+
+        if config.option.pylint_profile is not None:
+            self.profile = abspath(config.option.pylint_profile)
+            if not self.xdist_worker:
+                # Parts left behind by an interrupted run
+                from .profiling import get_profile_parts
+
+                for part in get_profile_parts(self.profile):
+                    remove(part)
+
+        ref = config.option.pylint_changed_since
+        if ref is not None:
+            try:
+                self.changed_files = get_changed_files(ref, config.rootpath)
+            except (OSError, CalledProcessError) as exc:
+                error = getattr(exc, "stderr", None) or exc
+                raise pytest.UsageError(
+                    f"--pylint-changed-since={ref}: {error}"
+                ) from exc
+
+    def _configure_baseline(self, config):
+        """Load the accepted messages of --pylint-baseline"""
+        path = config.option.pylint_baseline
+        self.baseline_update = config.option.pylint_baseline_update
+        if path is None:
+            if self.baseline_update:
+                raise pytest.UsageError(
+                    "--pylint-baseline-update needs a --pylint-baseline file"
+                )
+            return
+
+        from .baseline import Baseline
+
+        self.baseline = Baseline(path)
+        try:
+            self.baseline.load()
+        except FileNotFoundError as exc:
+            if not self.baseline_update:
+                raise pytest.UsageError(
+                    f"--pylint-baseline={path}: no such file, create it with "
+                    "--pylint-baseline-update"
+                ) from exc
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            raise pytest.UsageError(f"--pylint-baseline={path}: {exc}") from exc
+
+    def _load_config(self, config, pylintrc_file):
+        """
+        Load the pylint configuration file, reusing what was parsed on the
+        last run while the file has the same content.
+        """
+        with open(pylintrc_file, "rb") as f_p:
+            data = f_p.read()
+        toml = str(pylintrc_file).endswith(".toml")
+        content_hash = sha1(data).hexdigest()
+        cache = getattr(config, "cache", None)
+        parsed = cache.get(CONFIG_KEY, None) if cache is not None else None
+        if parsed is None or parsed.get("hash") != content_hash:
+            from .rcfile import (
+                get_config_digest,
+                get_plugin_distributions,
+                normalize_config,
+                parse_config,
+            )
+
+            content = parse_config(data, toml)
+            normalized = normalize_config(content)
+            parsed = {
+                "hash": content_hash,
+                "config": content,
+                "digest": get_config_digest(normalized),
+                "plugins": get_plugin_distributions(normalized),
+            }
+            if cache is not None:
+                try:
+                    cache.set(CONFIG_KEY, parsed)
+                except (TypeError, ValueError):
+                    # TOML dates and times don't fit in the cache
+                    pass
+
+        if toml:
+            self._load_pyproject_toml(parsed["config"])
+        else:
+            self._load_rc_file(parsed["config"])
+        return parsed
+
+    def _load_rc_file(self, sections):
+        # Values were read raw, so any % in them must not be interpolated
+        self.pylint_config = ConfigParser(interpolation=None)
+        self.pylint_config.read_dict(sections)
 
         try:
             ignore_string = self.pylint_config.get("MAIN", "ignore")
@@ -183,17 +544,10 @@ class PylintPlugin:
         except (NoSectionError, NoOptionError):
             pass
 
-    def _load_pyproject_toml(self, pylintrc_file):
-        with open(pylintrc_file, "rb") as f_p:
-            try:
-                content = tomllib.load(f_p)
-            except (TypeError, tomllib.TOMLDecodeError):
-                return
-
-        try:
-            self.pylint_config = content["tool"]["pylint"]
-        except KeyError:
+    def _load_pyproject_toml(self, content):
+        if content is None:
             return
+        self.pylint_config = content
 
         main_section = {}
         reports_section = {}
@@ -211,53 +565,460 @@ class PylintPlugin:
         self.pylint_ignore_patterns = main_section.get("ignore-patterns") or []
         self.pylint_msg_template = reports_section.get("msg-template")
 
+    def pytest_sessionstart(self, session):
+        """Have the other pytest-xdist workers wait for this one's results"""
+        if not self.xdist_worker:
+            return
+        from .exchange import ResultExchange
+
+        workerinput = session.config.workerinput
+        path = workerinput.get("pylint_exchange")
+        if ResultExchange.is_supported(path):
+            self.exchange = ResultExchange(path, workerinput["workerid"])
+            self.exchange.acquire()
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_configure_node(self, node):
+        """Give the pytest-xdist workers a directory to share results through"""
+        if self.exchange_dir is None:
+            from tempfile import mkdtemp
+
+            self.exchange_dir = mkdtemp(prefix="pytest-pylint-")
+        node.workerinput["pylint_exchange"] = self.exchange_dir
+
     def pytest_sessionfinish(self, session):
         """
-        Save file mtimes to pytest cache.
+        Save lint results to pytest cache.
 
         :param _pytest.main.Session session: the pytest session object
         """
-        if hasattr(session.config, "cache"):
-            session.config.cache.set(HISTKEY, self.mtimes)
+        if self.lint_pool is not None:
+            self.lint_pool.shutdown()
+        if self.exchange is not None:
+            self.exchange.release()
+        if self.exchange_dir is not None:
+            from shutil import rmtree
+
+            rmtree(self.exchange_dir, ignore_errors=True)
+        if self.similarity is not None and self.xdist_worker:
+            self.similarity.close()
+        if self.xdist_worker:
+            session.config.workeroutput["pylint_results"] = self.new_results
+            session.config.workeroutput["pylint_outcomes"] = self.outcomes
+            session.config.workeroutput["pylint_removed_results"] = sorted(
+                self.removed_results
+            )
+            session.config.workeroutput["pylint_durations"] = self.durations
+            session.config.workeroutput["pylint_checker_durations"] = dict(
+                self.checker_durations
+            )
+            if self.results is not None:
+                self.results.close()
+            return
+        if session.config.option.pylint_output_file:
+            self._write_report(session)
+        if self.baseline_update:
+            self._update_baseline(session)
+        if self.similarity is not None:
+            self.similarity.close()
+        if self.results is not None:
+            self._save_results(session)
+        if self.profile is not None:
+            from .profiling import merge_profiles
+
+            merge_profiles(self.profile, session.config.option.pylint_profile_collapsed)
+
+    def _save_results(self, session):
+        """Store the lint results of this session and the files that failed"""
+        for rel_path in self.close_files:
+            # Failed before the separate pass, so their results miss its
+            # messages
+            self.new_results.pop(rel_path, None)
+        if self.new_results:
+            # Results of later configurations are compared with this one
+            self.get_message_states(self.config_digest)
+        self.results.save(self.new_results, self.removed_results)
+        self.results.close()
+        failures = self.failures.union(self.outcomes)
+        session.config.cache.set(
+            FAILURES_KEY,
+            sorted(path for path in failures if self.outcomes.get(path, True)),
+        )
+
+    def _get_checked_messages(self, session):
+        """Give all the messages of each file checked in this session"""
+        duplicates = self.duplicates
+        if self.similarity is not None and not duplicates:
+            # Under pytest-xdist the workers updated the index
+            duplicates = self.similarity.get_duplicates(
+                {rel_path: str(session.path / rel_path) for rel_path in self.outcomes}
+            )
+        return {
+            rel_path: [
+                LintMessage(**fields)
+                for fields in self.new_results[rel_path]["messages"]
+            ]
+            + duplicates.get(rel_path, [])
+            for rel_path in self.outcomes
+        }
+
+    def _write_report(self, session):
+        """Write the messages of the files checked to --pylint-output-file"""
+        from .report import REPORTS
+
+        option = session.config.option
+        messages = self._get_checked_messages(session)
+        with REPORTS[option.pylint_output_format](option.pylint_output_file) as report:
+            for rel_path in sorted(messages):
+                for message in messages[rel_path]:
+                    report.write(message)
+
+    def _update_baseline(self, session):
+        """Accept the messages of the files checked into the baseline"""
+        from .baseline import read_lines
+
+        error_types = session.config.option.pylint_error_types
+        for rel_path, messages in self._get_checked_messages(session).items():
+            messages = [message for message in messages if message.C in error_types]
+            self.baseline.update(
+                rel_path, messages, read_lines(session.path / rel_path)
+            )
+        for rel_path in list(self.baseline.files):
+            item = self.collected_files.get(rel_path)
+            # Unchanged files without errors aren't checked again
+            passed = item is not None and item.cached_messages is not None
+            if passed:
+                passed = not any(
+                    message.C in error_types for message in item.cached_messages
+                )
+            if passed or not (session.path / rel_path).exists():
+                self.baseline.update(rel_path, [], [])
+        self.baseline.save()
+
+    def pytest_terminal_summary(self, terminalreporter):
+        """Report the slowest files to lint and pylint checkers"""
+        option = terminalreporter.config.option
+        timings = {"files": self.durations, "checkers": self.checker_durations}
+        if option.pylint_durations is not None:
+            for kind, durations in timings.items():
+                slowest = sorted(
+                    (duration, name)
+                    for name, duration in durations.items()
+                    if duration is not None
+                )[::-1]
+                if option.pylint_durations:
+                    slowest = slowest[: option.pylint_durations]
+                    title = f"slowest {option.pylint_durations} pylint {kind}"
+                else:
+                    title = f"slowest pylint {kind}"
+                terminalreporter.write_sep("=", title)
+                for duration, name in slowest:
+                    terminalreporter.write_line(f"{duration:.2f}s {name}")
+
+        if option.pylint_durations_json is not None:
+            with open(option.pylint_durations_json, "w", encoding="utf-8") as _file:
+                json.dump(timings, _file, indent=2, sort_keys=True)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        """Merge the lint results of a finished pytest-xdist worker"""
+        # pylint: disable=unused-argument
+        # Workers that crashed have no output
+        workeroutput = getattr(node, "workeroutput", {})
+        self.new_results.update(workeroutput.get("pylint_results", {}))
+        self.outcomes.update(workeroutput.get("pylint_outcomes", {}))
+        self.removed_results.update(workeroutput.get("pylint_removed_results", []))
+        # Workers only time the checkers of the files they lint themselves
+        self.durations.update(workeroutput.get("pylint_durations", {}))
+        self._add_checker_durations(workeroutput.get("pylint_checker_durations", {}))
+
+    def record_outcome(self, rel_path, failed):
+        """Remember whether the pylint check of a file failed"""
+        self.outcomes[rel_path] = failed
+
+    def get_new_errors(self, pylint_file, errors):
+        """Leave out the error messages of a file the baseline accepts"""
+        if self.baseline is None or not errors:
+            return errors
+        if self.baseline_update:
+            return []
+        from .baseline import read_lines
+
+        return self.baseline.get_new(
+            pylint_file.rel_path, errors, read_lines(pylint_file.path)
+        )
+
+    def get_result(self, rel_path):
+        """Give the result cached for a file on earlier runs, if any"""
+        if self.results is None:
+            return None
+        return self.results.get(rel_path)
+
+    def cache_result(self, item_file, messages):
+        """Store the messages of a linted file in the cache."""
+        self.new_results[item_file.rel_path] = {
+            "mtime": item_file.mtime,
+            "hash": item_file.file_hash,
+            "imports": item_file.imports,
+            "duration": self.durations.get(item_file.rel_path, item_file.duration),
+            "categories": self.message_categories,
+            "config": self.config_digest,
+            "messages": [message.to_dict() for message in messages],
+        }
+
+    def get_message_states(self, config):
+        """
+        Give the message states of a pylint configuration digest, computing
+        the ones of the current configuration if they weren't stored yet.
+        """
+        if config not in self.message_states:
+            states = None
+            if config is not None and self.results is not None:
+                states = self.results.get_states(config)
+            if states is None and config == self.config_digest:
+                from .pylint_util import get_message_states
+
+                states = get_message_states(
+                    [
+                        arg
+                        for arg in self._get_pylint_args()
+                        if not arg.startswith("--rcfile=")
+                    ],
+                    self.pylintrc_file,
+                )
+                if states is not None and self.results is not None:
+                    self.results.save_states(config, states)
+            self.message_states[config] = states
+        return self.message_states[config]
+
+    def update_result(self, entry):
+        """
+        Bring a cached result up to date with the pylint configuration. Drop
+        the messages disabled since, and give the ids of the messages enabled
+        since, to lint the file for again.
+
+        Gives ``None`` if the whole file needs to be linted again.
+        """
+        if entry.get("config") == self.config_digest:
+            return set()
+        old_states = self.get_message_states(entry.get("config"))
+        states = self.get_message_states(self.config_digest)
+        if old_states is None or states is None:
+            return None
+        stale = {
+            msg_id
+            for msg_id, state in states.items()
+            if old_states.get(msg_id) != state
+        }
+        # Informational messages like useless-suppression depend on all the
+        # others, and linting for everything is a full lint anyway.
+        if len(stale) == len(states) or any(msg_id[0] == "I" for msg_id in stale):
+            return None
+        entry["messages"] = [
+            fields
+            for fields in entry["messages"]
+            if fields["msg_id"] in states and fields["msg_id"] not in stale
+        ]
+        entry["config"] = self.config_digest
+        return stale
+
+    def keeps_categories(self, categories):
+        """
+        Tell whether results keeping only the messages of ``categories``,
+        or all of them if it is None, have every message needed.
+        """
+        return categories is None or (
+            self.message_categories is not None
+            and set(self.message_categories) <= set(categories)
+        )
 
     def pytest_collect_file(self, file_path, parent):
         """Collect files on which pylint should run"""
         if file_path.suffix != ".py":
             return None
 
-        rel_path = file_path.relative_to(parent.session.path)
-        if should_include_file(
-            str(rel_path), self.pylint_ignore, self.pylint_ignore_patterns
-        ):
-            item = PylintFile.from_parent(parent, path=file_path, plugin=self)
-        else:
+        rel_path = get_rel_path(str(file_path), str(parent.session.path))
+        if not self.file_filter.includes(rel_path):
             return None
-
-        # Check the cache if we should run it
-        if not item.should_skip:
-            self.pylint_files.add(rel_path)
+        item = PylintFile.from_parent(
+            parent, path=file_path, plugin=self, rel_path=rel_path
+        )
+
+        self.collected_files[rel_path] = item
+        # Only lint files without cached results
+        if item.cached_messages is None:
+            self.pylint_files.add(Path(rel_path))
+        else:
+            self.pylint_messages[rel_path] = list(item.cached_messages)
+            if item.stale_messages:
+                self.stale_messages[rel_path] = item.stale_messages
         return item
 
-    def pytest_collection_finish(self, session):
-        """Lint collected files"""
-        if not self.pylint_files:
-            return
+    def _invalidate_dependents(self, session):
+        """
+        Drop the cached results of files importing changed or removed files.
 
-        jobs = session.config.option.pylint_jobs
-        reporter = ProgrammaticReporter()
+        Inference based checks of a file depend on the modules it imports,
+        so their results are only valid as long as those didn't change.
+        """
+        changed = {str(rel_path) for rel_path in self.pylint_files}
+        imports = {}
+        for rel_path, item in self.collected_files.items():
+            if rel_path in changed:
+                with open(item.path, "rb") as f_p:
+                    item.imports = get_imported_modules(f_p.read(), rel_path)
+            imports[rel_path] = item.imports
+        stored = self.results.get_paths() if self.results is not None else []
+        for rel_path in stored:
+            if rel_path in self.collected_files:
+                continue
+            if not (session.path / rel_path).exists():
+                self.removed_results.add(rel_path)
+                changed.add(rel_path)
+                imports[rel_path] = []
+
+        for rel_path in get_dependents(changed, imports):
+            item = self.collected_files.get(rel_path)
+            if item is None or item.cached_messages is None:
+                continue
+            item.cached_messages = None
+            item.should_skip = False
+            del self.pylint_messages[rel_path]
+            self.stale_messages.pop(rel_path, None)
+            self.pylint_files.add(Path(rel_path))
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        """Select and order the pylint items to run"""
+        # pylint: disable=unused-argument
+        if config.option.pylint_shard is not None:
+            self._deselect_other_shards(config, items)
+        if config.option.pylint_granularity == "package":
+            self._group_by_package(items)
+        if config.option.maxfail and not self.xdist_worker:
+            # Fail fast on the files most likely to fail
+            pylint_items = sorted(
+                (item for item in items if isinstance(item, PyLintItem)),
+                key=lambda item: min(
+                    self._get_priority(pylint_file.rel_path)
+                    for pylint_file in item.files
+                ),
+            )
+            items[:] = pylint_items + [
+                item for item in items if not isinstance(item, PyLintItem)
+            ]
+
+    def _get_priority(self, rel_path):
+        """Sort key putting files that failed before, then the newest, first"""
+        return (
+            rel_path not in self.failures,
+            -(self.collected_files[rel_path].mtime or 0),
+            rel_path,
+        )
+
+    @staticmethod
+    def _group_by_package(items):
+        """Replace the pylint items of the files of each package by one item"""
+        packages = {}
+        # Each package takes the place of the item of its first file
+        grouped = []
+        for item in items:
+            if not isinstance(item, PyLintItem):
+                grouped.append(item)
+                continue
+            package = item.parent.parent
+            if package not in packages:
+                packages[package] = []
+                grouped.append(package)
+            packages[package].append(item.parent)
+        items[:] = [
+            (
+                PyLintItem.from_parent(
+                    package,
+                    name="PYLINT",
+                    nodeid=f"{PylintPlugin._get_directory(package)}::PYLINT",
+                    files=packages[package],
+                )
+                if package in packages
+                else package
+            )
+            for package in grouped
+        ]
 
-        # To try and bullet proof our paths, use our
-        # relative paths to the resolved path of the pytest rootpath
-        try:
-            root_path = session.config.rootpath.resolve()
-        except AttributeError:
-            root_path = Path(session.config.rootdir.realpath())
+    @staticmethod
+    def _get_directory(collector):
+        """
+        Give the directory of a collector relative to the rootdir, empty for
+        the rootdir itself, whichever file pytest names packages after.
+        """
+        path = collector.path
+        if not path.is_dir():
+            # Packages are named after their __init__.py before pytest 8
+            path = path.parent
+        directory = path.relative_to(collector.session.path).as_posix()
+        return "" if directory == "." else directory
+
+    def _deselect_other_shards(self, config, items):
+        """Deselect the pylint items of other shards with --pylint-shard"""
+        # Recorded durations differ between nodes, sizes don't
+        shard = get_shard(
+            {rel_path: item.size for rel_path, item in self.collected_files.items()},
+            *config.option.pylint_shard,
+        )
+        self.other_shards = set(self.collected_files) - shard
+        selected = []
+        deselected = []
+        for item in items:
+            if (
+                isinstance(item, PyLintItem)
+                and item.parent.rel_path in self.other_shards
+            ):
+                deselected.append(item)
+            else:
+                selected.append(item)
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = selected
+
+    def _exclude(self, rel_path):
+        """Don't lint a file after all"""
+        self.stale_messages.pop(rel_path, None)
+        if Path(rel_path) in self.pylint_files:
+            self.pylint_files.remove(Path(rel_path))
+            # Its cached result may be outdated but isn't replaced
+            self.new_results.pop(rel_path, None)
+            self.removed_results.add(rel_path)
+
+    def _select_changed(self, session):
+        """
+        Skip the files that didn't change since the reference given with
+        ``--pylint-changed-since``.
+        """
+        option = session.config.option
+        if self.changed_files is None:
+            return
 
-        args_list = [
-            str((root_path / file_path).relative_to(getcwd()))
-            for file_path in self.pylint_files
-        ]
-        # Add any additional arguments to our pylint run
+        selected = self.changed_files & set(self.collected_files)
+        if option.pylint_changed_dependents:
+            imports = {
+                rel_path: item.imports
+                for rel_path, item in self.collected_files.items()
+            }
+            for rel_path in self.changed_files:
+                # Removed files are looked up by module name too
+                if rel_path.endswith(".py"):
+                    imports.setdefault(rel_path, [])
+            selected.update(get_dependents(self.changed_files, imports))
+
+        for rel_path, item in self.collected_files.items():
+            if rel_path in selected:
+                continue
+            item.should_skip = True
+            item.skip_reason = f"file unchanged since {option.pylint_changed_since}"
+            self._exclude(rel_path)
+
+    def _get_pylint_args(self, jobs=None):
+        """Give the options to pass to pylint along with the files"""
+        args_list = []
         if self.pylintrc_file:
             args_list.append(f"--rcfile={self.pylintrc_file}")
         if jobs is not None:
@@ -271,29 +1032,506 @@ class PylintPlugin:
             args_list.append(
                 f"--ignore-patterns={','.join(self.pylint_ignore_patterns)}"
             )
-        print("-" * FILL_CHARS)
-        print("Linting files")
+        if self.similarity is not None:
+            # Looked for with the index instead
+            args_list.append("--disable=duplicate-code")
+        return args_list
 
-        # Run pylint over the collected files.
+    def _get_message_args(self, msg_ids=None):
+        """
+        Give the options to only check for the messages of ``msg_ids`` if
+        given, or else to leave out the ones linted for in a separate pass.
+        """
+        if msg_ids is not None:
+            return ["--disable=all", f"--enable={','.join(sorted(msg_ids))}"]
+        if self.close_messages:
+            return [f"--disable={','.join(sorted(self.close_messages))}"]
+        return []
 
-        # Pylint has changed APIs, but we support both
-        # pylint: disable=unexpected-keyword-arg
-        try:
-            # pylint >= 2.5.1 API
-            result = lint.Run(args_list, reporter=reporter, exit=False)
-        except TypeError:
-            # pylint < 2.5.1 API
-            result = lint.Run(args_list, reporter=reporter, do_exit=False)
+    def _get_close_messages(self):
+        """
+        Give the ids of the enabled messages pylint only reports once all the
+        files are linted, which linting them in parts would miss.
+        """
+        from .pylint_util import CLOSE_MESSAGES
+
+        states = self.get_message_states(self.config_digest)
+        if states is None:
+            return set(CLOSE_MESSAGES)
+        return {msg_id for msg_id in CLOSE_MESSAGES if msg_id in states}
+
+    def _get_lint_options(self):
+        """Give the options of linting in another process"""
+        return {
+            "pylint_args": self._get_pylint_args() + self._get_message_args(),
+            "categories": self.message_categories,
+            "module_cache": self.module_cache,
+            "time_checkers": self.time_checkers,
+            "profile": self.profile,
+        }
+
+    def _estimate_costs(self, rel_paths):
+        """
+        Estimate how long linting each file takes from the durations recorded
+        on earlier runs, or its size for files that weren't timed yet.
+        """
+        timed = [
+            self.collected_files[rel_path]
+            for rel_path in rel_paths
+            if self.collected_files[rel_path].duration
+        ]
+        timed_size = sum(item.size for item in timed)
+        if timed_size:
+            seconds_per_byte = sum(item.duration for item in timed) / timed_size
+        else:
+            seconds_per_byte = DEFAULT_SECONDS_PER_BYTE
+
+        costs = {}
+        for rel_path in rel_paths:
+            item = self.collected_files[rel_path]
+            costs[rel_path] = item.duration or item.size * seconds_per_byte
+        return costs
+
+    def _start_pool(self, session, file_paths):
+        """Start linting the files in worker processes, longest first"""
+        from .pool import LintPool
+
+        option = session.config.option
+        # Like pylint's, zero jobs means one process per CPU
+        workers = int(option.pylint_jobs or 0) or cpu_count() or 1
+        if len(file_paths) > 1:
+            self.close_messages = self._get_close_messages()
+        self.lint_pool = LintPool(
+            workers,
+            self._get_lint_options(),
+            files_per_worker=option.pylint_files_per_worker,
+            max_memory=option.pylint_max_memory and option.pylint_max_memory * 2**20,
+        )
+
+        if self.close_messages:
+            # Batches can't see the files of the others, so duplicate code and
+            # cyclic imports are looked for in all of them at once.
+            self.lint_pool.submit(file_paths, msg_ids=self.close_messages)
+
+        # Aim for a few batches per worker, so the small ones can fill the
+        # gaps left by the largest files.
+        costs = self._estimate_costs(file_paths)
+        if option.maxfail:
+            # To fail fast, the files most likely to fail start on their own
+            for rel_path in sorted(costs, key=self._get_priority)[:workers]:
+                del costs[rel_path]
+                self.lint_pool.submit({rel_path: file_paths[rel_path]})
+        batch_cost = min(MAX_BATCH_COST, sum(costs.values()) / (workers * 4))
+        for batch in schedule_batches(
+            costs, batch_cost, max_files=option.pylint_files_per_worker
+        ):
+            self.lint_pool.submit(
+                {rel_path: file_paths[rel_path] for rel_path in batch}
+            )
+        self.lint_pool.start()
+
+    def _lint_files(self, file_paths, jobs=None, msg_ids=None):
+        """
+        Run pylint over ``file_paths`` and store the messages per file, only
+        checking for the messages of ``msg_ids`` if given.
+        """
+        from .pylint_util import ProgrammaticReporter
+
+        args_list = (
+            list(file_paths)
+            + self._get_pylint_args(jobs)
+            + self._get_message_args(msg_ids)
+        )
+        reporter = ProgrammaticReporter(categories=self.message_categories)
+        self._run_pylint(args_list, reporter)
 
-        messages = result.linter.reporter.data
         # Stores the messages in a dictionary for lookup in tests.
-        for message in messages:
+        for path, messages in reporter.messages.items():
             # Undo our mapping to resolved absolute paths to map
             # back to self.pylint_files
-            relpath = message.abspath.replace(f"{root_path}{sep}", "")
-            self.pylint_messages[relpath].append(message)
+            relpath = path.replace(f"{self.root_path}{sep}", "")
+            self.pylint_messages[relpath].extend(messages)
+        if msg_ids is not None:
+            # Not an estimate of the cost of linting the files
+            return
+        for path, duration in reporter.durations.items():
+            self.durations[path.replace(f"{self.root_path}{sep}", "")] = duration
+
+    def _get_file_paths(self, rel_paths):
+        """Give the paths to pass to pylint of files, by relative path"""
+        return {
+            str(rel_path): str((self.root_path / rel_path).relative_to(getcwd()))
+            for rel_path in rel_paths
+        }
+
+    @staticmethod
+    def _get_root_path(session):
+        """
+        To try and bullet proof our paths, use our relative paths to the
+        resolved path of the pytest rootpath
+        """
+        try:
+            return session.config.rootpath.resolve()
+        except AttributeError:
+            return Path(session.config.rootdir.realpath())
+
+    def _lint_stale_messages(self, jobs, rel_paths=None):
+        """
+        Lint unchanged files, or the ones among ``rel_paths`` if given, for
+        the messages enabled since they were linted only, adding to their
+        cached messages.
+        """
+        stale_messages = {
+            rel_path: msg_ids
+            for rel_path, msg_ids in self.stale_messages.items()
+            if rel_paths is None or rel_path in rel_paths
+        }
+        if not stale_messages:
+            return
+        files = defaultdict(list)
+        for rel_path, file_path in self._get_file_paths(stale_messages).items():
+            files[frozenset(stale_messages[rel_path])].append(file_path)
+        print("-" * FILL_CHARS)
+        print(
+            f"Linting {len(stale_messages)} unchanged files for "
+            "newly enabled messages"
+        )
+        for msg_ids, file_paths in files.items():
+            self._lint_files(file_paths, jobs, msg_ids=msg_ids)
         print("-" * FILL_CHARS)
 
+    def _run_pylint(self, args_list, reporter):
+        """Run pylint in this process, with the caching and profiling asked for"""
+        from .profiling import LintProfiler
+        from .pylint_util import CheckerTimer, run_pylint
+
+        timer = CheckerTimer() if self.time_checkers else nullcontext()
+        profiler = LintProfiler(self.profile) if self.profile else nullcontext()
+        with self.module_cache or nullcontext(), timer, profiler:
+            run_pylint(args_list, reporter)
+        if self.time_checkers:
+            for durations in timer.get_durations().values():
+                self._add_checker_durations(durations)
+
+    def _lint_until_failures(self, file_paths, option):
+        """
+        Lint the files most likely to fail first, twice as many at a time, until
+        ``--maxfail`` files fail. The rest are linted by their items if they
+        run at all.
+        """
+        error_types = option.pylint_error_types
+        # Unchanged files fail from the cache
+        failed = sum(
+            not item.should_skip
+            and item.cached_messages is not None
+            and rel_path not in self.other_shards
+            for rel_path, item in self.collected_files.items()
+        )
+        pending = sorted(file_paths, key=self._get_priority)
+        if len(pending) > 1:
+            self.close_messages = self._get_close_messages()
+        size = 1
+        while pending and failed < option.maxfail:
+            batch, pending = pending[:size], pending[size:]
+            self._lint_files(
+                [file_paths[rel_path] for rel_path in batch], option.pylint_jobs
+            )
+            failed += sum(
+                any(
+                    message.C in error_types
+                    for message in self.pylint_messages[rel_path]
+                )
+                for rel_path in batch
+            )
+            size *= 2
+        self.lazy_files = {rel_path: file_paths[rel_path] for rel_path in pending}
+        if self.close_messages:
+            # Chunks can't see the files of the others, so duplicate code and
+            # cyclic imports are looked for in all of them at once, but only
+            # once a check that may pass needs it.
+            self.close_files = dict(file_paths)
+
+    def _lint_with_daemon(self, session, file_paths):
+        """Lint the files with the daemon keeping pylint state warm"""
+        from importlib.metadata import version
+
+        from .daemon import get_socket_path, lint_with_daemon
+
+        # The daemon restarts when anything it holds in memory is outdated
+        fingerprint = sha1(
+            json.dumps(
+                [self.config_fingerprint, version("astroid"), sys.executable]
+            ).encode()
+        ).hexdigest()
+        results = lint_with_daemon(
+            get_socket_path(session.config.cache.mkdir("pylint")),
+            fingerprint,
+            file_paths.values(),
+            self._get_lint_options(),
+        )
+        for rel_path, file_path in file_paths.items():
+            self._set_result(rel_path, results[abspath(file_path)])
+
+    def _set_result(self, rel_path, result):
+        """Add the serialized lint result of a file"""
+        self.pylint_messages[rel_path].extend(
+            LintMessage(**fields) for fields in result["messages"]
+        )
+        if result.get("duration") is not None:
+            self.durations[rel_path] = result["duration"]
+        self._add_checker_durations(result.get("checkers", {}))
+
+    def _lint_share(self, session, file_paths):
+        """
+        Lint the share of the files of this pytest-xdist worker and share their
+        results with the other workers, which lint the rest of the files.
+        """
+        jobs = session.config.option.pylint_jobs
+        if self.exchange is None:
+            # Without a way to share results, every worker lints everything
+            self._lint_work(file_paths, jobs=jobs)
+            return
+
+        names = [
+            f"gw{index}" for index in range(session.config.workerinput["workercount"])
+        ]
+        # Shards are contiguous ranges of paths, computed alike by all workers
+        costs = self._estimate_costs(file_paths)
+        for index, name in enumerate(names):
+            shard = get_shard(costs, index + 1, len(names))
+            self.shared_work[name, "files"] = (
+                {rel_path: file_paths[rel_path] for rel_path in sorted(shard)},
+                None,
+            )
+        changed = {
+            rel_path: path
+            for rel_path, path in file_paths.items()
+            if rel_path not in self.stale_messages
+        }
+        if len(names) > 1 and len(changed) > 1:
+            self.close_messages = self._get_close_messages()
+        if self.close_messages:
+            # Duplicate code and cyclic imports are looked for in all the files
+            self.shared_work[names[0], "close"] = (changed, self.close_messages)
+
+        for (name, key), (work, msg_ids) in self.shared_work.items():
+            if name == self.exchange.name:
+                self._lint_work(work, msg_ids, jobs)
+                self.exchange.share(key, self._get_serialized_results(work, msg_ids))
+                continue
+            for rel_path in work:
+                self.shared_sources.setdefault(rel_path, []).append((name, key))
+        self.exchange.release()
+
+    def _get_serialized_results(self, rel_paths, msg_ids=None):
+        """
+        Give the messages and lint duration of each file, only the messages of
+        ``msg_ids`` if given, to send to another process.
+        """
+        results = {}
+        for rel_path in rel_paths:
+            # Others already have the cached messages of unchanged files
+            kept = msg_ids if msg_ids is not None else self.stale_messages.get(rel_path)
+            results[rel_path] = {
+                "messages": [
+                    message.to_dict()
+                    for message in self.pylint_messages.get(rel_path, [])
+                    if kept is None or message.msg_id in kept
+                ],
+                "duration": self.durations.get(rel_path) if kept is None else None,
+            }
+        return results
+
+    def _lint_work(self, work, msg_ids=None, jobs=None):
+        """
+        Lint a share of the files, only for the messages of ``msg_ids`` if
+        given, or else for their stale messages if they are unchanged.
+        """
+        if msg_ids is None:
+            self._lint_stale_messages(jobs, work)
+            work = {
+                rel_path: path
+                for rel_path, path in work.items()
+                if rel_path not in self.stale_messages
+            }
+        if work:
+            self._lint_files(work.values(), jobs, msg_ids=msg_ids)
+
+    def _get_shared_results(self, name, key):
+        """
+        Give the results worker ``name`` shared under ``key``, linting its
+        files here instead if it stopped before sharing them.
+        """
+        if (name, key) not in self.shared_results:
+            results = self.exchange.get(name, key)
+            if results is None:
+                work, msg_ids = self.shared_work[name, key]
+                # Messages go straight to the files' results
+                self._lint_work(work, msg_ids)
+                results = {}
+            self.shared_results[name, key] = results
+        return self.shared_results[name, key]
+
+    def _add_checker_durations(self, durations):
+        for checker, duration in durations.items():
+            self.checker_durations[checker] += duration
+
+    def lint_lazy_files(self, rel_paths):
+        """Lint the files among ``rel_paths`` that are only linted when needed"""
+        lazy_files = [
+            self.lazy_files.pop(rel_path)
+            for rel_path in rel_paths
+            if rel_path in self.lazy_files
+        ]
+        if lazy_files:
+            self._lint_files(lazy_files)
+
+    def get_messages(self, rel_path):
+        """Give the messages of a file, waiting for it if it is being linted."""
+        if self.lint_pool is not None and rel_path in self.lint_pool:
+            self._set_result(rel_path, self.lint_pool.result(rel_path))
+        elif rel_path in self.shared_sources:
+            for name, key in self.shared_sources.pop(rel_path):
+                result = self._get_shared_results(name, key).get(rel_path)
+                if result is not None:
+                    self._set_result(rel_path, result)
+        elif rel_path in self.lazy_files:
+            self._lint_files([self.lazy_files.pop(rel_path)])
+        if rel_path in self.close_files and not any(
+            message.C in self.error_types for message in self.pylint_messages[rel_path]
+        ):
+            self._lint_close_files()
+        return self.pylint_messages.get(rel_path, [])
+
+    def _lint_close_files(self):
+        """
+        Run the separate pass over the files linted in parts, adding its
+        messages to the results of the checks that failed already.
+        """
+        file_paths, self.close_files = self.close_files, {}
+        self._lint_files(file_paths.values(), msg_ids=self.close_messages)
+        for rel_path in file_paths:
+            if rel_path in self.new_results:
+                self.new_results[rel_path]["messages"] = [
+                    message.to_dict() for message in self.pylint_messages[rel_path]
+                ]
+
+    def pytest_collection_finish(self, session):
+        """Lint collected files"""
+        if session.config.option.collectonly:
+            # Nothing runs, so there is nothing to lint
+            return
+        self._invalidate_dependents(session)
+        self._select_changed(session)
+        for rel_path in self.other_shards:
+            self._exclude(rel_path)
+        if self.similarity is not None:
+            self._find_duplicates(session)
+        if not self.pylint_files and not self.stale_messages:
+            return
+
+        self.root_path = self._get_root_path(session)
+        if self.xdist_worker:
+            # Unchanged files are shared out too, for their stale messages
+            self._lint_share(
+                session,
+                self._get_file_paths(self.pylint_files.union(self.stale_messages)),
+            )
+            return
+        self._lint_stale_messages(session.config.option.pylint_jobs)
+        if not self.pylint_files:
+            return
+
+        file_paths = self._get_file_paths(self.pylint_files)
+
+        print("-" * FILL_CHARS)
+        if session.config.option.pylint_background:
+            print("Linting files in the background")
+            self._start_pool(session, file_paths)
+            print("-" * FILL_CHARS)
+            return
+
+        print("Linting files")
+        # Run pylint over the collected files.
+        option = session.config.option
+        if (
+            option.pylint_pool
+            or option.pylint_files_per_worker
+            or option.pylint_max_memory
+        ):
+            self._start_pool(session, file_paths)
+            for rel_path in file_paths:
+                self.get_messages(rel_path)
+        elif (
+            option.pylint_daemon
+            and hasattr(socket, "AF_UNIX")
+            and hasattr(session.config, "cache")
+        ):
+            self._lint_with_daemon(session, file_paths)
+        elif option.maxfail:
+            self._lint_until_failures(file_paths, option)
+        else:
+            self._lint_files(file_paths.values(), session.config.option.pylint_jobs)
+        print("-" * FILL_CHARS)
+
+    def _find_duplicates(self, session):
+        """
+        Update the index of duplicate code with the files that changed, and
+        check again the files with duplicates that would have been skipped.
+        """
+        files = self.collected_files
+        self.similarity.update(
+            {
+                rel_path: (item.file_hash, str(item.path))
+                for rel_path, item in files.items()
+            },
+            str(session.path),
+        )
+        self.duplicates = self.similarity.get_duplicates(
+            {rel_path: str(item.path) for rel_path, item in files.items()}
+        )
+        error_types = session.config.option.pylint_error_types
+        for rel_path, messages in self.duplicates.items():
+            item = self.collected_files[rel_path]
+            if item.skip_reason == PylintFile.skip_reason and any(
+                message.C in error_types for message in messages
+            ):
+                item.should_skip = False
+
+
+class PylintOnlyPlugin:
+    """
+    Keep pytest from collecting anything but the pylint checks, so test
+    modules and packages are never imported with ``--pylint-only``.
+    """
+
+    def __init__(self, plugin):
+        self.plugin = plugin
+
+    @pytest.hookimpl(optionalhook=True, tryfirst=True)
+    def pytest_collect_directory(self, path, parent):
+        """Collect packages as plain directories, not to import them"""
+        return pytest.Dir.from_parent(parent, path=path)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_collect_file(self):
+        """Drop the test modules and other files collected by other plugins"""
+        outcome = yield
+        outcome.force_result(
+            [node for node in outcome.get_result() if isinstance(node, PylintFile)]
+        )
+
+    def pytest_ignore_collect(self, collection_path, config):
+        """Don't walk directories and files pylint ignores"""
+        rel_path = get_rel_path(str(collection_path), str(config.rootpath))
+        if collection_path.is_dir():
+            ignored = self.plugin.file_filter.ignores_dir(rel_path)
+        else:
+            ignored = collection_path.suffix != ".py" or (
+                not self.plugin.file_filter.includes(rel_path)
+            )
+        return ignored or None
+
 
 class PylintFile(pytest.File):
     """File that pylint will run on."""
@@ -301,20 +1539,66 @@ class PylintFile(pytest.File):
     rel_path = None  # : str
     plugin = None  # : PylintPlugin
     should_skip = False  # : bool
+    skip_reason = "file(s) previously passed pylint checks"  # : str
     mtime = None  # : float
+    size = None  # : int
+    duration = None  # : float
+    file_hash = None  # : str
+    cached_messages = None  # : list
+    stale_messages = None  # : set
+    imports = ()  # : list
 
     @classmethod
-    def from_parent(cls, parent, *, path, plugin, **kw):
+    def from_parent(cls, parent, *, path, plugin, rel_path=None, **kw):
         # pylint: disable=arguments-differ
         # We add the ``plugin`` kwarg to get plugin level information so the
         # signature differs
         _self = getattr(super(), "from_parent", cls)(parent, path=path, **kw)
         _self.plugin = plugin
 
-        _self.rel_path = get_rel_path(str(path), str(parent.session.path))
-        _self.mtime = path.stat().st_mtime
-        prev_mtime = _self.plugin.mtimes.get(_self.rel_path, 0)
-        _self.should_skip = prev_mtime == _self.mtime
+        if rel_path is None:
+            rel_path = get_rel_path(str(path), str(parent.session.path))
+        _self.rel_path = rel_path
+        stat = path.stat()
+        _self.mtime = stat.st_mtime
+        _self.size = stat.st_size
+
+        # Only hash the contents when the mtime differs from the cache, so
+        # untouched files are cheap and fresh checkouts still get cache hits.
+        entry = _self.plugin.get_result(_self.rel_path)
+        if entry is not None:
+            # Even if the file changed this is the best estimate of its cost
+            _self.duration = entry.get("duration")
+        if entry is not None and entry["mtime"] == _self.mtime:
+            _self.file_hash = entry["hash"]
+        else:
+            _self.file_hash = get_file_hash(path)
+
+        config = None
+        if (
+            entry is not None
+            and entry["hash"] == _self.file_hash
+            and _self.plugin.keeps_categories(entry.get("categories"))
+        ):
+            config = entry.get("config")
+            _self.stale_messages = _self.plugin.update_result(entry)
+        if _self.stale_messages is not None:
+            # Results still missing stale messages are only stored once the
+            # file is linted for them
+            if not _self.stale_messages and (
+                entry["mtime"] != _self.mtime or entry["config"] != config
+            ):
+                entry["mtime"] = _self.mtime
+                _self.plugin.new_results[_self.rel_path] = entry
+            _self.imports = entry.get("imports", [])
+            _self.cached_messages = [
+                LintMessage(**dict(fields, abspath=str(path)))
+                for fields in entry["messages"]
+            ]
+            error_types = parent.config.option.pylint_error_types
+            _self.should_skip = not _self.stale_messages and not any(
+                message.C in error_types for message in _self.cached_messages
+            )
 
         return _self
 
@@ -328,11 +1612,15 @@ class PyLintItem(pytest.Item):
 
     parent = None  # : PylintFile
     plugin = None  # : PylintPlugin
+    files = None  # : list
 
-    def __init__(self, *args, **kw):
+    def __init__(self, *args, files=None, **kw):
         super().__init__(*args, **kw)
         self.add_marker(MARKER)
-        self.plugin = self.parent.plugin
+        # The files of a package with --pylint-granularity=package
+        self.package = files is not None
+        self.files = files if self.package else [self.parent]
+        self.plugin = self.files[0].plugin
 
         msg_format = self.plugin.pylint_msg_template
         if msg_format is None:
@@ -345,43 +1633,50 @@ class PyLintItem(pytest.Item):
         return getattr(super(), "from_parent", cls)(parent, **kw)
 
     def setup(self):
-        """Mark unchanged files as SKIPPED."""
-        if self.parent.should_skip:
-            pytest.skip("file(s) previously passed pylint checks")
+        """Mark unchanged files that passed as SKIPPED."""
+        if all(pylint_file.should_skip for pylint_file in self.files):
+            pytest.skip(self.files[0].skip_reason)
 
     def runtest(self):
         """Check the pylint messages to see if any errors were reported."""
-        pylint_output_file = self.config.option.pylint_output_file
-
-        def _loop_errors(writer):
-            reported_errors = []
-            for error in self.plugin.pylint_messages.get(self.parent.rel_path, []):
-                if error.C in self.config.option.pylint_error_types:
-                    reported_errors.append(error.format(self._msg_format))
-
-                writer(
-                    f"{error.path}:{error.line}: [{error.msg_id}"
-                    f"({error.symbol}), {error.obj}] "
-                    f"{error.msg}\n"
+        pylint_files = [
+            pylint_file for pylint_file in self.files if not pylint_file.should_skip
+        ]
+        self.plugin.lint_lazy_files(
+            [pylint_file.rel_path for pylint_file in pylint_files]
+        )
+
+        reported_errors = []
+        for pylint_file in pylint_files:
+            messages = self.plugin.get_messages(pylint_file.rel_path)
+
+            # Cache the results whether they pass or not, so unchanged files
+            # with known messages don't need to be linted again. The report
+            # of --pylint-output-file is written from them too.
+            self.plugin.cache_result(pylint_file, messages)
+            messages = messages + self.plugin.duplicates.get(pylint_file.rel_path, [])
+
+            file_errors = [
+                error.format(self._msg_format)
+                for error in self.plugin.get_new_errors(
+                    pylint_file,
+                    [
+                        message
+                        for message in messages
+                        if message.C in self.config.option.pylint_error_types
+                    ],
                 )
-
-            return reported_errors
-
-        if pylint_output_file:
-            output_dir = dirname(pylint_output_file)
-            if output_dir:
-                makedirs(output_dir, exist_ok=True)
-            with open(pylint_output_file, "a", encoding="utf-8") as _file:
-                reported_errors = _loop_errors(writer=_file.write)
-        else:
-            reported_errors = _loop_errors(writer=lambda *args, **kwargs: None)
+            ]
+            self.plugin.record_outcome(pylint_file.rel_path, bool(file_errors))
+            if self.package:
+                file_errors = [
+                    f"{pylint_file.rel_path}: {error}" for error in file_errors
+                ]
+            reported_errors.extend(file_errors)
 
         if reported_errors:
             raise PyLintException("\n".join(reported_errors))
 
-        # Update the cache if the item passed pylint.
-        self.plugin.mtimes[self.parent.rel_path] = self.parent.mtime
-
     def repr_failure(self, excinfo, style=None):
         """Handle any test failures by checking that they were ours."""
         # pylint: disable=arguments-differ
@@ -392,4 +1687,7 @@ class PyLintItem(pytest.Item):
     def reportinfo(self):
         """Generate our test report"""
         # pylint: disable=no-member
+        if self.package:
+            directory = self.nodeid.rsplit("::", 1)[0]
+            return self.path, None, f"[pylint] {directory or '.'}"
         return self.path, None, f"[pylint] {self.parent.rel_path}"
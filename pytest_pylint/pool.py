@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""Linting in worker processes managed by the plugin."""
+import io
+import multiprocessing
+import os
+import sys
+import traceback
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from contextlib import nullcontext, redirect_stdout
+from multiprocessing.connection import wait
+from os.path import abspath
+from threading import Thread
+
+from .profiling import LintProfiler
+from .pylint_util import CheckerTimer, FileStream, ProgrammaticReporter, run_pylint
+
+
+def get_memory():
+    """
+    Give the resident memory of this process in bytes, or its peak where the
+    current one isn't known, if any
+    """
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def lint_files(
+    file_paths,
+    pylint_args,
+    *,
+    categories=None,
+    module_cache=None,
+    time_checkers=False,
+    profile=None,
+    msg_ids=None,
+    on_result=None,
+):  # pylint: disable=too-many-arguments
+    """
+    Lint ``file_paths`` and give the serialized messages and lint duration of
+    each of them, keyed by absolute path. Only messages of ``categories`` are
+    kept if given, and only the messages of ``msg_ids`` are checked for if
+    given, which leaves the duration out. Astroid trees are loaded from and stored in
+    ``module_cache`` when given, ``time_checkers`` adds the time spent in
+    each checker and linting is profiled into a part of the ``profile`` if
+    given.
+
+    This runs in a worker process, so the messages are returned as
+    dictionaries that can be sent back to the main process. ``on_result`` is
+    called with the path and result of each file as soon as it is known.
+    """
+    reporter = ProgrammaticReporter(categories=categories)
+    timer = CheckerTimer() if time_checkers else nullcontext()
+    profiler = LintProfiler(profile) if profile else nullcontext()
+    results = {}
+    if msg_ids is not None:
+        pylint_args = pylint_args + [
+            "--disable=all",
+            f"--enable={','.join(sorted(msg_ids))}",
+        ]
+
+    def finish(path):
+        reporter.finish_module()
+        results[path] = {
+            "messages": [message.to_dict() for message in reporter.messages[path]],
+            # Not an estimate of the cost of linting the file
+            "duration": reporter.durations.get(path) if msg_ids is None else None,
+        }
+        if time_checkers:
+            results[path]["checkers"] = timer.get_durations().get(path, {})
+        if on_result is not None:
+            on_result(path, results[path])
+
+    stream = FileStream(finish) if on_result else nullcontext()
+    # Progress output from a worker would interleave with the test output
+    with redirect_stdout(io.StringIO()), module_cache or nullcontext(), timer:
+        with profiler, stream:
+            run_pylint(list(file_paths) + pylint_args, reporter)
+
+    for path in map(abspath, file_paths):
+        if path not in results:
+            finish(path)
+    return results
+
+
+def work(conn, lint_options, files_per_worker, max_memory):
+    """
+    Lint the batches of files received on ``conn`` until told to stop, with
+    the keyword arguments ``lint_options`` of :func:`lint_files`. The result
+    of each file is sent as soon as it is known, then whether the batch
+    failed.
+
+    The worker retires once it linted ``files_per_worker`` files or its
+    memory grew by ``max_memory`` bytes since it started, so the caches
+    pylint and astroid build up are freed and the pool starts a fresh worker
+    instead.
+    """
+
+    def send_result(path, result):
+        conn.send(("result", path, result))
+
+    linted = 0
+    start_memory = get_memory() if max_memory else None
+    while True:
+        task = conn.recv()
+        if task is None:
+            return
+        file_paths, msg_ids = task
+        try:
+            lint_files(
+                file_paths, msg_ids=msg_ids, on_result=send_result, **lint_options
+            )
+            error = None
+        except Exception:  # pylint: disable=broad-except
+            error = traceback.format_exc()
+        linted += len(file_paths)
+        used_memory = start_memory is not None and get_memory() - start_memory
+        retire = bool(
+            (files_per_worker and linted >= files_per_worker)
+            or (used_memory and used_memory >= max_memory)
+        )
+        conn.send(("done", error, retire))
+        if retire:
+            return
+
+
+def get_context():
+    """
+    Give the multiprocessing context to start workers with. The pool starts
+    them from a thread, which makes forking the process running the tests
+    unsafe, so they fork from a server that already imported pylint instead,
+    or are spawned where there is none.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+class Worker:
+    """A worker process and the batch of files it is linting."""
+
+    def __init__(self, worker_args):
+        context = get_context()
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=work, args=(child_conn,) + worker_args, daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.task = None
+
+    def assign(self, task):
+        """Start linting a batch of files"""
+        self.task = task
+        self.conn.send(task[:2])
+
+    def receive(self):
+        """
+        Resolve the futures of the batch being linted the worker sent results
+        for, or all of them once it is done with the batch.
+
+        :returns: whether the worker retired
+        """
+        *_, futures = self.task
+        try:
+            kind, *payload = self.conn.recv()
+        except EOFError:
+            self.process.join()
+            error = (
+                f"pylint worker exited with code {self.process.exitcode} "
+                f"while linting {', '.join(futures)}"
+            )
+            kind, payload = "done", (error, True)
+
+        if kind == "result":
+            path, result = payload
+            future = futures.pop(path, None)
+            if future is not None and future.set_running_or_notify_cancel():
+                future.set_result(result)
+            return False
+
+        error, retire = payload
+        self.task = None
+        for future in futures.values():
+            if future.set_running_or_notify_cancel():
+                future.set_exception(
+                    RuntimeError(error or "pylint gave no result for the file")
+                )
+        if retire:
+            self.process.join()
+            self.conn.close()
+        return retire
+
+    def stop(self):
+        """Let the worker exit once it is done"""
+        if self.process.is_alive() and self.task is None:
+            try:
+                self.conn.send(None)
+            except OSError:
+                # The pool is shutting down and terminated the process
+                pass
+        self.process.join()
+
+
+class LintPool:
+    """
+    Process pool linting batches of files, with a future per file and batch.
+
+    Unlike ``concurrent.futures`` executors, workers are recycled after a
+    number of files or once they use too much memory.
+    """
+
+    def __init__(self, workers, lint_options, files_per_worker=None, max_memory=None):
+        self.workers = workers
+        self.worker_args = (lint_options, files_per_worker, max_memory)
+        self.futures = defaultdict(list)
+        self.tasks = deque()
+        self.running = []
+        self.stopping = False
+        self.thread = None
+
+    def __contains__(self, rel_path):
+        return rel_path in self.futures
+
+    def submit(self, file_paths, msg_ids=None):
+        """
+        Queue a batch of files to lint, in the order they should start.
+
+        :param dict file_paths: paths of the files to lint by relative path
+        :param msg_ids: ids of the only messages to check the batch for
+        """
+        futures = {}
+        for rel_path, file_path in file_paths.items():
+            futures[abspath(file_path)] = Future()
+            self.futures[rel_path].append(futures[abspath(file_path)])
+        self.tasks.append((list(file_paths.values()), msg_ids, futures))
+
+    def start(self):
+        """Start linting the queued batches"""
+        self.thread = Thread(target=self._dispatch, daemon=True)
+        self.thread.start()
+
+    def result(self, rel_path):
+        """
+        Wait for the messages and lint duration of the file at ``rel_path``,
+        merged over the batches it is in.
+        """
+        merged = {"messages": [], "duration": None, "checkers": {}}
+        for future in self.futures.pop(rel_path):
+            result = future.result()
+            merged["messages"] += result["messages"]
+            if result["duration"] is not None:
+                merged["duration"] = result["duration"]
+            for checker, duration in result.get("checkers", {}).items():
+                merged["checkers"][checker] = (
+                    merged["checkers"].get(checker, 0) + duration
+                )
+        return merged
+
+    def shutdown(self):
+        """Stop linting files whose results are no longer needed."""
+        cancelled = [
+            future.cancel() for futures in self.futures.values() for future in futures
+        ]
+        # Otherwise workers are only finishing up, like writing profiles
+        if any(cancelled):
+            self.stopping = True
+            for worker in self.running:
+                worker.process.terminate()
+        if self.thread is not None:
+            self.thread.join()
+
+    def _dispatch(self):
+        """Hand out batches to workers, replacing the ones that retire"""
+        self.running = [
+            Worker(self.worker_args) for _ in range(min(self.workers, len(self.tasks)))
+        ]
+        while not self.stopping and (
+            self.tasks or any(worker.task for worker in self.running)
+        ):
+            for worker in self.running:
+                if worker.task is None and self.tasks:
+                    worker.assign(self.tasks.popleft())
+
+            wait([worker.conn for worker in self.running if worker.task])
+            for index, worker in enumerate(self.running):
+                if self.stopping or not worker.task or not worker.conn.poll():
+                    continue
+                if worker.receive() and self.tasks:
+                    self.running[index] = Worker(self.worker_args)
+
+        for worker in self.running:
+            worker.stop()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""Profiling of linting, merged over all the processes that lint."""
+import cProfile
+import glob
+import os
+import pstats
+import tempfile
+from collections import defaultdict
+from os.path import basename, dirname
+
+# Stacks with less of the total time than this are left out of flame graphs
+MIN_STACK_SHARE = 1e-4
+
+
+class LintProfiler:
+    """
+    Context manager profiling the code it runs into a part of the profile at
+    ``path``, to be merged with :func:`merge_profiles`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.profile = None
+
+    def __enter__(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.disable()
+        handle, part_path = tempfile.mkstemp(
+            prefix=f"{basename(self.path)}.", suffix=".part", dir=dirname(self.path)
+        )
+        os.close(handle)
+        self.profile.dump_stats(part_path)
+
+
+def get_profile_parts(path):
+    """Give the parts of the profile at ``path`` written so far"""
+    return glob.glob(f"{glob.escape(path)}.*.part")
+
+
+def merge_profiles(path, collapsed_path=None):
+    """
+    Merge the parts of the profile at ``path`` into it, and write them as
+    collapsed stacks for flame graphs to ``collapsed_path`` if given.
+    """
+    parts = get_profile_parts(path)
+    if not parts:
+        return
+    stats = pstats.Stats(*parts)
+    stats.dump_stats(path)
+    for part in parts:
+        os.unlink(part)
+
+    if collapsed_path is not None:
+        with open(collapsed_path, "w", encoding="utf-8") as _file:
+            for stack, duration in sorted(get_collapsed_stacks(stats.stats).items()):
+                _file.write(f"{stack} {duration}\n")
+
+
+def _get_label(func):
+    file_name, line, name = func
+    if file_name == "~":
+        return name
+    return f"{name} ({basename(file_name)}:{line})"
+
+
+def get_collapsed_stacks(stats):
+    """
+    Give the microseconds spent in each stack of ``stats``, the stack being
+    the ``;`` separated function names from the outermost call.
+
+    cProfile only records callers and callees, not whole stacks, so the time
+    of a function is split between the stacks calling it in proportion to
+    the time spent in each call site.
+
+    :param dict stats: the ``stats`` attribute of a :class:`pstats.Stats`
+    """
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            callees[caller][func] = cumulative
+    min_time = sum(entry[2] for entry in stats.values()) * MIN_STACK_SHARE
+
+    stacks = defaultdict(int)
+
+    def visit(func, stack, funcs, budget):
+        _, _, total, cumulative, _ = stats[func]
+        stack = f"{stack};{_get_label(func)}" if stack else _get_label(func)
+        scale = budget / cumulative if cumulative else 0
+        stacks[stack] += round(total * scale * 1e6)
+        for callee, callee_time in callees[func].items():
+            # Recursive calls are part of the time of the outer call already
+            if callee not in funcs and callee_time * scale >= min_time:
+                visit(callee, stack, funcs | {callee}, callee_time * scale)
+
+    for func, (_, _, _, cumulative, callers) in stats.items():
+        if not callers:
+            visit(func, "", {func}, cumulative)
+    return {stack: duration for stack, duration in stacks.items() if duration}
@@ -1,37 +1,259 @@
 # -*- coding: utf-8 -*-
 """Pylint reporter classes."""
+import json
 import sys
+from collections import defaultdict
+from functools import wraps
+from hashlib import sha1
+from os.path import abspath
+from time import perf_counter
 
+from pylint import lint
+from pylint.checkers import BaseChecker
 from pylint.reporters import BaseReporter
 
+from .util import LintMessage
+
+# Messages pylint only reports once every file is linted, cyclic-import and
+# duplicate-code
+CLOSE_MESSAGES = ("R0401", "R0801")
+# Options of pylint itself that don't change the messages of a file
+OUTPUT_OPTIONS = {
+    "clear-cache-post-run",
+    "disable",
+    "enable",
+    "evaluation",
+    "exit-zero",
+    "fail-on",
+    "fail-under",
+    "files",
+    "from-stdin",
+    "ignore",
+    "ignore-paths",
+    "ignore-patterns",
+    "jobs",
+    "msg-template",
+    "output-format",
+    "persistent",
+    "recursive",
+    "reports",
+    "score",
+}
+
+
+def run_pylint(args_list, reporter):
+    """Run pylint with ``args_list`` reporting to ``reporter``"""
+    # Pylint has changed APIs, but we support both
+    # pylint: disable=unexpected-keyword-arg
+    try:
+        # pylint >= 2.5.1 API
+        return lint.Run(args_list, reporter=reporter, exit=False)
+    except TypeError:
+        # pylint < 2.5.1 API
+        return lint.Run(args_list, reporter=reporter, do_exit=False)
+
+
+def reports_on_close(linter):
+    """Tell whether ``linter`` may report messages once all files are linted"""
+    if any(linter.is_message_enabled(msg_id) for msg_id in CLOSE_MESSAGES):
+        return True
+    # Checkers of plugins could report any of their messages when closed
+    return any(
+        type(checker).close is not BaseChecker.close
+        and not type(checker).__module__.startswith("pylint.")
+        and any(linter.is_message_enabled(msg_id) for msg_id in checker.msgs)
+        for checker in linter.get_checkers()
+    )
+
+
+class FileStream:
+    """
+    Context manager calling ``on_file`` with the absolute path of each file
+    as soon as pylint is done linting it.
+
+    Some messages are only reported once all files are linted, so if any of
+    them may be, files are only done when pylint returns. The plugin lints
+    for the ones of pylint in a separate pass, so its batches stream.
+    """
+
+    def __init__(self, on_file):
+        self.on_file = on_file
+        self.lint_file = None
+        self.streaming = None
+
+    def __enter__(self):
+        # pylint: disable=protected-access
+        self.lint_file = getattr(lint.PyLinter, "_lint_file", None)
+        if self.lint_file is None:
+            # Older pylint versions don't lint files one at a time
+            return self
+
+        def _lint_file(linter, file, *args, **kwargs):
+            self.lint_file(linter, file, *args, **kwargs)
+            if self.streaming is None:
+                self.streaming = not reports_on_close(linter)
+            if self.streaming:
+                self.on_file(abspath(file.filepath))
+
+        lint.PyLinter._lint_file = _lint_file
+        return self
+
+    def __exit__(self, *exc_info):
+        # pylint: disable=protected-access
+        if self.lint_file is not None:
+            lint.PyLinter._lint_file = self.lint_file
+
+
+class CheckerTimer:
+    """
+    Context manager timing the methods pylint calls on its checkers, by
+    checker name and file.
+    """
+
+    # Methods called per node or per module, and when linting is done
+    prefixes = ("visit_", "leave_")
+    methods = ("process_module", "process_tokens", "close")
+
+    def __init__(self):
+        self.prepare_checkers = None
+        self.durations = defaultdict(lambda: defaultdict(float))
+
+    def __enter__(self):
+        self.prepare_checkers = lint.PyLinter.prepare_checkers
+
+        def prepare_checkers(linter):
+            checkers = self.prepare_checkers(linter)
+            for checker in checkers:
+                self.instrument(linter, checker)
+            return checkers
+
+        lint.PyLinter.prepare_checkers = prepare_checkers
+        return self
+
+    def __exit__(self, *exc_info):
+        lint.PyLinter.prepare_checkers = self.prepare_checkers
+
+    def instrument(self, linter, checker):
+        """Time the methods of ``checker`` pylint calls"""
+        for name in dir(checker):
+            if name.startswith(self.prefixes) or name in self.methods:
+                method = getattr(checker, name)
+                if callable(method):
+                    setattr(checker, name, self._timed(linter, checker.name, method))
+
+    def _timed(self, linter, checker_name, method):
+        # wraps keeps the attributes pylint uses to skip disabled checks
+        @wraps(method)
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.durations[linter.current_file][checker_name] += (
+                    perf_counter() - start
+                )
+
+        return timed
+
+    def get_durations(self):
+        """Give the time spent in each checker, by absolute path of file"""
+        return {
+            abspath(path): dict(durations)
+            for path, durations in self.durations.items()
+            if path
+        }
+
+
+def get_message_states(args_list, config_file=None):
+    """
+    Give the state of each message enabled by the options in ``args_list``
+    and ``config_file``, by message id. The state is a digest of the options
+    of all the checkers and of pylint itself, since checkers read the options
+    of others, so only enabling or disabling messages keeps the states of the
+    others.
+
+    Gives ``None`` if pylint can't be configured without linting.
+    """
+    try:
+        # pylint: disable=import-outside-toplevel
+        from pylint.config.config_initialization import _config_initialization
+    except ImportError:
+        return None
+
+    linter = lint.PyLinter()
+    linter.load_default_plugins()
+    try:
+        _config_initialization(linter, args_list, config_file=config_file)
+    except SystemExit:
+        # Invalid options are reported when linting
+        return None
+
+    options = defaultdict(dict)
+    for checker in linter.get_checkers():
+        for name, _ in checker.options:
+            if checker is not linter or name not in OUTPUT_OPTIONS:
+                options[checker.name][name] = getattr(
+                    linter.config, name.replace("-", "_"), None
+                )
+    digest = sha1(
+        json.dumps(options, sort_keys=True, default=repr).encode()
+    ).hexdigest()[:16]
+    return {
+        message.msgid: digest
+        for message in linter.msgs_store.messages
+        if linter.is_message_enabled(message.msgid)
+    }
+
 
 class ProgrammaticReporter(BaseReporter):
     """Reporter that replaces output with storage in list of dictionaries"""
 
     extension = "prog"
 
-    def __init__(self, output=None):
+    def __init__(self, output=None, categories=None):
         BaseReporter.__init__(self, output)
         self.current_module = None
-        self.data = []
+        self.module_start = None
+        # Letters of the message categories to keep, all of them if None
+        self.categories = categories
+        # Kept messages as LintMessage, keyed by absolute path
+        self.messages = defaultdict(list)
+        # Wall time spent on each module, keyed by absolute path
+        self.durations = {}
 
     def add_message(self, msg_id, location, msg):
         """Deprecated, but required"""
         raise NotImplementedError
 
     def handle_message(self, msg):
-        """Get message and append to our data structure"""
-        self.data.append(msg)
+        """Store the message, unless its category isn't wanted"""
+        if self.categories is None or msg.C in self.categories:
+            self.messages[msg.abspath].append(LintMessage.from_message(msg))
 
     def _display(self, layout):
         """launch layouts display"""
 
+    def finish_module(self):
+        """Record the time spent on the module being analysed"""
+        if self.current_module is not None:
+            self.durations[self.current_module] = (
+                self.durations.get(self.current_module, 0)
+                + perf_counter()
+                - self.module_start
+            )
+        self.current_module = None
+
     def on_set_current_module(self, module, filepath):
         """Hook called when a module starts to be analysed."""
+        self.finish_module()
+        if filepath:
+            self.current_module = abspath(filepath)
+            self.module_start = perf_counter()
         print(".", end="")
         sys.stdout.flush()
 
     def on_close(self, stats, previous_stats):
         """Hook called when all modules finished analyzing."""
+        self.finish_module()
         # print a new line when pylint is finished
         print("")
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Parsing of the pylint configuration file, and a fingerprint of the
+configuration that only changes when pylint's results can.
+"""
+import json
+import sys
+from configparser import ConfigParser
+from hashlib import sha1
+
+# Options listing messages, in which order and repetition don't matter
+MESSAGE_LISTS = {"disable", "enable"}
+
+
+def parse_config(data, toml):
+    """
+    Give the pylint configuration in the content of a configuration file, as
+    the options of each section. A TOML file without a ``tool.pylint`` table
+    gives ``None``.
+
+    :param bytes data: the content of the file
+    :param bool toml: whether the file is TOML rather than INI
+    """
+    text = data.decode("utf-8")
+    if toml:
+        if sys.version_info >= (3, 11):
+            import tomllib  # pylint: disable=import-outside-toplevel
+        else:
+            # pylint: disable=import-error,import-outside-toplevel
+            import tomli as tomllib
+
+        try:
+            return tomllib.loads(text)["tool"]["pylint"]
+        except (TypeError, KeyError, tomllib.TOMLDecodeError):
+            return None
+
+    parser = ConfigParser()
+    parser.read_string(text)
+    return {
+        section: dict(parser.items(section, raw=True)) for section in parser.sections()
+    }
+
+
+def _normalize_value(name, value):
+    if isinstance(value, str):
+        value = [line.strip() for line in value.strip().splitlines()]
+        value = value[0] if len(value) == 1 else [line for line in value if line]
+    if name in MESSAGE_LISTS:
+        if not isinstance(value, str):
+            value = ",".join(str(item) for item in value)
+        value = sorted({item.strip() for item in value.split(",")} - {""})
+    return value
+
+
+def normalize_config(pylint_config):
+    """
+    Give the pylint configuration without what doesn't change its meaning:
+    the case and spelling of section names, the order of sections and
+    options, the whitespace around values and the order of message lists.
+    """
+    normalized = {}
+    for section, options in (pylint_config or {}).items():
+        if not isinstance(options, dict):
+            continue
+        section = section.lower().replace("_", " ")
+        if section.startswith("pylint."):
+            section = section[len("pylint.") :]
+        if section == "master":
+            section = "main"
+        normalized_options = normalized.setdefault(section, {})
+        for name, value in options.items():
+            name = name.lower().replace("_", "-")
+            normalized_options[name] = _normalize_value(name, value)
+    return normalized
+
+
+def get_plugin_distributions(pylint_config):
+    """
+    Give the names of the distributions providing the pylint plugins loaded
+    by the normalized pylint configuration.
+    """
+    # pylint: disable=import-outside-toplevel
+    try:
+        from importlib.metadata import packages_distributions
+    except ImportError:
+        # Before Python 3.10 plugins are only told apart by the configuration
+        return []
+
+    plugins = pylint_config.get("main", {}).get("load-plugins") or []
+    if not isinstance(plugins, str):
+        plugins = ",".join(plugins)
+    plugins = [plugin.strip() for plugin in plugins.split(",") if plugin.strip()]
+    if not plugins:
+        return []
+    distributions = packages_distributions()
+    return sorted(
+        {
+            name
+            for plugin in plugins
+            for name in distributions.get(plugin.split(".")[0], [])
+        }
+    )
+
+
+def get_config_digest(pylint_config):
+    """Give a digest of the normalized pylint configuration"""
+    content = json.dumps(pylint_config, sort_keys=True, default=str)
+    return sha1(content.encode()).hexdigest()
+
+
+def get_versions(distributions=()):
+    """
+    Give the versions of Python, pylint, astroid, this plugin and the
+    ``distributions`` of the pylint plugins loaded, which lint results
+    depend on.
+    """
+    # pylint: disable=import-outside-toplevel
+    from importlib.metadata import PackageNotFoundError, version
+
+    versions = [sys.implementation.name, sys.version.split()[0]]
+    for name in ("pylint", "astroid", "pytest-pylint", *distributions):
+        try:
+            versions.append(f"{name}=={version(name)}")
+        except PackageNotFoundError:
+            versions.append(name)
+    return "\0".join(versions)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""Reports of the pylint messages written to a file in several formats."""
+import json
+import os
+from os.path import dirname
+from pathlib import PurePath
+
+# Write to the report in large chunks rather than once per message
+BUFFER_SIZE = 1024 * 1024
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_LEVELS = {"F": "error", "E": "error", "W": "warning"}
+
+
+class TextReport:
+    """
+    Report of pylint messages in pylint's parseable format, appended to the
+    file at ``path``. Used as a context manager around writing messages.
+    """
+
+    mode = "a"
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        output_dir = dirname(self.path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        # pylint: disable=consider-using-with
+        self.file = open(self.path, self.mode, encoding="utf-8", buffering=BUFFER_SIZE)
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.finish()
+        self.file.close()
+        self.file = None
+
+    def start(self):
+        """Write what comes before the messages"""
+
+    def finish(self):
+        """Write what comes after the messages"""
+
+    def write(self, message):
+        """Write a :class:`pytest_pylint.util.LintMessage`"""
+        self.file.write(
+            f"{message.path}:{message.line}: [{message.msg_id}"
+            f"({message.symbol}), {message.obj}] {message.msg}\n"
+        )
+
+
+class JsonLinesReport(TextReport):
+    """Report of pylint messages as one JSON object per line."""
+
+    def write(self, message):
+        fields = message.to_dict()
+        del fields["abspath"]
+        self.file.write(json.dumps(fields) + "\n")
+
+
+class SarifReport(TextReport):
+    """
+    Report of pylint messages in the SARIF format read by code scanning
+    tools. Results are written as they come and the rules they refer to once
+    all of them are known.
+    """
+
+    mode = "w"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.rules = {}
+        self.results = 0
+
+    def start(self):
+        self.rules = {}
+        self.results = 0
+        self.file.write(
+            f'{{"$schema": "{SARIF_SCHEMA}", "version": "2.1.0", '
+            '"runs": [{"results": [\n'
+        )
+
+    def finish(self):
+        driver = {
+            "name": "pylint",
+            "informationUri": "https://pylint.readthedocs.io",
+            "rules": [
+                {"id": msg_id, "name": symbol}
+                for msg_id, symbol in sorted(self.rules.items())
+            ],
+        }
+        self.file.write(f'\n], "tool": {{"driver": {json.dumps(driver)}}}}}]}}\n')
+
+    def write(self, message):
+        region = {"startLine": max(message.line or 1, 1)}
+        if message.column is not None:
+            region["startColumn"] = message.column + 1
+        if message.end_line is not None:
+            region["endLine"] = message.end_line
+        if message.end_column is not None:
+            region["endColumn"] = message.end_column + 1
+        result = {
+            "ruleId": message.msg_id,
+            "level": SARIF_LEVELS.get(message.C, "note"),
+            "message": {"text": message.msg},
+            "locations": [
+                {
+                    "physicalLocation": {
+                        "artifactLocation": {"uri": PurePath(message.path).as_posix()},
+                        "region": region,
+                    }
+                }
+            ],
+        }
+        if self.results:
+            self.file.write(",\n")
+        self.file.write(json.dumps(result))
+        self.results += 1
+        self.rules.setdefault(message.msg_id, message.symbol)
+
+
+REPORTS = {"text": TextReport, "jsonl": JsonLinesReport, "sarif": SarifReport}
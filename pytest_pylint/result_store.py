@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""SQLite store of the lint results of each file between runs."""
+import json
+import os
+import sqlite3
+import time
+
+# Results written longest ago are dropped beyond this many files
+MAX_RESULTS = 100000
+# Seconds to wait for another pytest process to finish writing
+LOCK_TIMEOUT = 30
+# Message states of the most recent pylint configurations kept
+MAX_STATES = 10
+
+
+class ResultStore:
+    """
+    Lint results of each file keyed by relative path, in a SQLite database at
+    ``path``.
+
+    Results are read one file at a time and only the ones that changed are
+    written back, so neither depends on the number of files stored. The store
+    keeps at most ``max_results`` of them.
+
+    The database is connected to again if it is removed, like when
+    pytest-xdist workers clear the pytest cache directory.
+    """
+
+    def __init__(self, path, max_results=MAX_RESULTS):
+        self.path = str(path)
+        self.max_results = max_results
+        self.fingerprint = None
+        self._connection = None
+        self._inode = None
+        self._open()
+
+    @property
+    def connection(self):
+        """The connection to the database, made again if it was removed"""
+        try:
+            removed = os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            removed = True
+        if removed:
+            self._connection.close()
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._open()
+            if self.fingerprint is not None:
+                self.validate(self.fingerprint)
+        return self._connection
+
+    def _open(self):
+        try:
+            self._connection = self._connect()
+        except sqlite3.DatabaseError:
+            # Not a database, or one left corrupt, is rebuilt from scratch
+            os.unlink(self.path)
+            self._connection = self._connect()
+        self._inode = os.stat(self.path).st_ino
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT)
+        try:
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+                )
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    "rel_path TEXT PRIMARY KEY, entry TEXT, written REAL)"
+                )
+                connection.execute(
+                    "CREATE INDEX IF NOT EXISTS results_written ON results (written)"
+                )
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS states (config TEXT PRIMARY KEY, "
+                    "states TEXT)"
+                )
+        except sqlite3.DatabaseError:
+            connection.close()
+            raise
+        return connection
+
+    def validate(self, fingerprint):
+        """Drop the results of any other pylint version and configuration"""
+        self.fingerprint = fingerprint
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'config'"
+        ).fetchone()
+        if row is not None and row[0] == fingerprint:
+            return
+        with self.connection:
+            self.connection.execute("DELETE FROM results")
+            self.connection.execute("DELETE FROM states")
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('config', ?)", (fingerprint,)
+            )
+
+    def get(self, rel_path):
+        """Give the result stored for a file, ``None`` if there is none"""
+        row = self.connection.execute(
+            "SELECT entry FROM results WHERE rel_path = ?", (rel_path,)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def get_states(self, config):
+        """
+        Give the message states stored for a pylint configuration digest,
+        ``None`` if there are none.
+        """
+        row = self.connection.execute(
+            "SELECT states FROM states WHERE config = ?", (config,)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def save_states(self, config, states):
+        """
+        Store the message states of a pylint configuration digest, and drop
+        the ones of all but the most recent configurations.
+        """
+        with self.connection:
+            self.connection.execute("DELETE FROM states WHERE config = ?", (config,))
+            self.connection.execute(
+                "INSERT INTO states VALUES (?, ?)", (config, json.dumps(states))
+            )
+            self.connection.execute(
+                "DELETE FROM states WHERE rowid NOT IN ("
+                "SELECT rowid FROM states ORDER BY rowid DESC LIMIT ?)",
+                (MAX_STATES,),
+            )
+
+    def get_paths(self):
+        """Give the relative paths of all the files with a stored result"""
+        return [
+            rel_path
+            for (rel_path,) in self.connection.execute("SELECT rel_path FROM results")
+        ]
+
+    def save(self, results, removed=()):
+        """
+        Store new ``results`` keyed by relative path and drop the ones of the
+        ``removed`` files, then the oldest ones beyond the size cap.
+        """
+        written = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                (
+                    (rel_path, json.dumps(entry), written)
+                    for rel_path, entry in results.items()
+                ),
+            )
+            self.connection.executemany(
+                "DELETE FROM results WHERE rel_path = ?",
+                ((rel_path,) for rel_path in removed),
+            )
+            if results:
+                self.connection.execute(
+                    "DELETE FROM results WHERE rel_path IN ("
+                    "SELECT rel_path FROM results ORDER BY written DESC, rowid DESC "
+                    "LIMIT -1 OFFSET ?)",
+                    (self.max_results,),
+                )
+
+    def close(self):
+        """Close the database"""
+        self._connection.close()
@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental search of duplicate code, with an index of the lines of each
+file kept between runs.
+
+Pylint's ``similarities`` checker compares every file with every other one
+each time. The index keeps a fingerprint of the stripped lines of each file
+and of each window of ``min-similarity-lines`` of them, so only changed files
+are compared, and only with the files sharing a window with them.
+"""
+import json
+import re
+import sqlite3
+from configparser import ConfigParser
+from hashlib import sha1
+from os.path import exists, join
+
+from .util import LintMessage, get_module_names
+
+# Files disabling duplicate-code anywhere are left out as a whole
+DISABLE_PRAGMA = re.compile(
+    r"#\s*pylint:\s*disable\s*=[^\n]*\b(duplicate-code|R0801)\b"
+)
+# Disabling any of these in the configuration turns the checker off
+DISABLED_NAMES = {"all", "duplicate-code", "R0801", "similarities"}
+# Lines without code are kept as they are, pylint doesn't count them as common
+CODE_LINE = re.compile(r".*\w+")
+# Candidate lookups are split to stay under SQLite's limit of variables
+MAX_VARIABLES = 500
+LOCK_TIMEOUT = 30
+
+
+def get_similarity_options(pylint_config):
+    """
+    Give the options of the ``similarities`` checker set in the pylint
+    configuration, as a ConfigParser or the ``tool.pylint`` table of a TOML
+    file, with pylint's defaults for the others.
+    """
+    # pylint: disable=import-outside-toplevel
+    from pylint.checkers.symilar import SimilaritiesChecker
+
+    options = {name: option["default"] for name, option in SimilaritiesChecker.options}
+    for name, value in _get_section(pylint_config, "similarities").items():
+        if name not in options:
+            continue
+        if isinstance(value, str):
+            if name == "min-similarity-lines":
+                value = int(value)
+            else:
+                value = value.strip().lower() in ("y", "yes", "true", "1")
+        options[name] = value
+
+    disabled = _get_section(pylint_config, "messages control").get("disable", "")
+    if isinstance(disabled, str):
+        disabled = disabled.split(",")
+    if DISABLED_NAMES & {name.strip() for name in disabled}:
+        # Pylint doesn't look for duplicate code either
+        options["min-similarity-lines"] = 0
+    return options
+
+
+def _get_section(pylint_config, name):
+    """Give a section of the pylint configuration, in any case and spelling"""
+    if isinstance(pylint_config, ConfigParser):
+        for section in pylint_config.sections():
+            if section.lower() == name:
+                return dict(pylint_config.items(section))
+        return {}
+    for key, value in (pylint_config or {}).items():
+        if key.lower().replace("_", " ") == name:
+            return value
+    return {}
+
+
+def get_fingerprint(text):
+    """Give the stable fingerprint of a stripped line"""
+    if not CODE_LINE.match(text):
+        return text
+    return sha1(text.encode("utf-8", "surrogateescape")).hexdigest()[:16]
+
+
+def get_module_name(rel_path):
+    """Give the name pylint reports the module of a file under"""
+    names = get_module_names(rel_path)
+    return names[0] if names else rel_path
+
+
+def _make_lineset(rel_path, lines):
+    """Give a pylint LineSet of the indexed lines of a file"""
+    # pylint: disable=import-outside-toplevel
+    from pylint.checkers.symilar import LineSet, LineSpecifs
+
+    lineset = LineSet(get_module_name(rel_path), [])
+    lineset._stripped_lines = [  # pylint: disable=protected-access
+        LineSpecifs(line_number=line_number, text=text) for line_number, text in lines
+    ]
+    return lineset
+
+
+def _read_source(path):
+    with open(path, "rb") as f_p:
+        return f_p.read().decode("utf-8", "replace")
+
+
+class SimilarityIndex:
+    """
+    Index of the stripped lines of each file and of the duplicate code found
+    between them, in a SQLite database at ``path``.
+
+    :param dict options: the options of the ``similarities`` checker
+    """
+
+    def __init__(self, path, options):
+        self.path = str(path)
+        self.options = options
+        self.min_lines = options["min-similarity-lines"]
+        self.connection = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT)
+        with self.connection:
+            for statement in (
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+                "CREATE TABLE IF NOT EXISTS files "
+                "(rel_path TEXT PRIMARY KEY, hash TEXT, lines TEXT)",
+                "CREATE TABLE IF NOT EXISTS windows (hash INTEGER, rel_path TEXT)",
+                "CREATE INDEX IF NOT EXISTS windows_hash ON windows (hash)",
+                "CREATE INDEX IF NOT EXISTS windows_path ON windows (rel_path)",
+                "CREATE TABLE IF NOT EXISTS duplicates "
+                "(rel_path TEXT, other TEXT, line INTEGER, msg TEXT)",
+                "CREATE INDEX IF NOT EXISTS duplicates_path ON duplicates (rel_path)",
+                "CREATE INDEX IF NOT EXISTS duplicates_other ON duplicates (other)",
+            ):
+                self.connection.execute(statement)
+
+    @staticmethod
+    def is_supported():
+        """
+        Tell whether pylint's similarities checker has the parts the index
+        reuses, as it does from pylint 3 on
+        """
+        # pylint: disable=import-outside-toplevel
+        from inspect import signature
+
+        try:
+            from pylint.checkers import symilar
+        except ImportError:
+            return False
+        if not all(
+            hasattr(symilar, name) for name in ("LineSet", "LineSpecifs", "Symilar")
+        ) or not hasattr(symilar.Symilar, "_iter_sims"):
+            return False
+        parameters = list(signature(symilar.stripped_lines).parameters)
+        return parameters[:5] == [
+            "lines",
+            "ignore_comments",
+            "ignore_docstrings",
+            "ignore_imports",
+            "ignore_signatures",
+        ]
+
+    def validate(self, fingerprint):
+        """Drop the index of any other pylint version and configuration"""
+        (stored,) = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'config'"
+        ).fetchone() or (None,)
+        if stored == fingerprint:
+            return
+        with self.connection:
+            for table in ("files", "windows", "duplicates"):
+                self.connection.execute(f"DELETE FROM {table}")
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('config', ?)", (fingerprint,)
+            )
+
+    def get_lines(self, source):
+        """
+        Give the line number and fingerprint of each line of ``source`` the
+        similarities checker compares.
+        """
+        # pylint: disable=import-outside-toplevel
+        from pylint.checkers.symilar import stripped_lines
+
+        if DISABLE_PRAGMA.search(source):
+            return []
+        try:
+            lines = stripped_lines(
+                source.splitlines(True),
+                self.options["ignore-comments"],
+                self.options["ignore-docstrings"],
+                self.options["ignore-imports"],
+                self.options["ignore-signatures"],
+            )
+        except Exception:  # pylint: disable=broad-except
+            # Files astroid can't parse are reported by pylint already
+            return []
+        return [[line.line_number, get_fingerprint(line.text)] for line in lines]
+
+    def get_windows(self, lines):
+        """Give the hashes of every window of ``min-similarity-lines`` lines"""
+        texts = [text for _, text in lines]
+        return {
+            int.from_bytes(
+                sha1("\n".join(texts[index : index + self.min_lines]).encode())
+                .digest()[:8],
+                "big",
+                signed=True,
+            )
+            for index in range(len(texts) - self.min_lines + 1)
+        }
+
+    def update(self, files, root):
+        """
+        Index the files that changed since they were indexed, drop the ones
+        that were removed, and find the duplicate code of changed files.
+
+        :param dict files: content hash and path of each file by relative path
+        :param str root: directory the relative paths are relative to
+        """
+        if not self.min_lines:
+            return
+        # Parallel pytest-xdist workers update the index one at a time
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            indexed = dict(self.connection.execute("SELECT rel_path, hash FROM files"))
+            changed = {
+                rel_path: path
+                for rel_path, (file_hash, path) in files.items()
+                if indexed.get(rel_path) != file_hash
+            }
+            removed = [
+                rel_path
+                for rel_path in indexed
+                if rel_path not in files and not exists(join(root, rel_path))
+            ]
+            self._remove(list(changed) + removed)
+
+            sources = {}
+            linesets = {}
+            for rel_path, path in changed.items():
+                sources[rel_path] = _read_source(path).splitlines()
+                linesets[rel_path] = self.get_lines("\n".join(sources[rel_path]))
+                self.connection.execute(
+                    "INSERT INTO files VALUES (?, ?, ?)",
+                    (rel_path, files[rel_path][0], json.dumps(linesets[rel_path])),
+                )
+                self.connection.executemany(
+                    "INSERT INTO windows VALUES (?, ?)",
+                    (
+                        (window, rel_path)
+                        for window in self.get_windows(linesets[rel_path])
+                    ),
+                )
+
+            for rel_path, lines in linesets.items():
+                for other in self._get_candidates(rel_path, lines):
+                    if other in linesets and other < rel_path:
+                        # Already compared from the other file
+                        continue
+                    other_lines = linesets.get(other)
+                    if other_lines is None:
+                        other_lines = self._load_lines(other)
+                    self._add_duplicates(
+                        rel_path, lines, sources[rel_path], other, other_lines
+                    )
+        except BaseException:
+            self.connection.rollback()
+            raise
+        self.connection.commit()
+
+    def _remove(self, rel_paths):
+        for rel_path in rel_paths:
+            for statement in (
+                "DELETE FROM files WHERE rel_path = ?",
+                "DELETE FROM windows WHERE rel_path = ?",
+                "DELETE FROM duplicates WHERE rel_path = ?",
+                "DELETE FROM duplicates WHERE other = ?",
+            ):
+                self.connection.execute(statement, (rel_path,))
+
+    def _load_lines(self, rel_path):
+        (lines,) = self.connection.execute(
+            "SELECT lines FROM files WHERE rel_path = ?", (rel_path,)
+        ).fetchone()
+        return json.loads(lines)
+
+    def _get_candidates(self, rel_path, lines):
+        """Give the other files sharing a window of lines with a file"""
+        windows = list(self.get_windows(lines))
+        candidates = set()
+        for start in range(0, len(windows), MAX_VARIABLES):
+            chunk = windows[start : start + MAX_VARIABLES]
+            candidates.update(
+                other
+                for (other,) in self.connection.execute(
+                    "SELECT DISTINCT rel_path FROM windows WHERE hash IN "
+                    f"({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+            )
+        candidates.discard(rel_path)
+        return sorted(candidates)
+
+    def _add_duplicates(self, rel_path, lines, source, other, other_lines):
+        """Find the duplicate code of two files the way pylint does"""
+        # pylint: disable=import-outside-toplevel,too-many-arguments
+        from pylint.checkers.symilar import Symilar
+
+        symilar = Symilar(min_lines=self.min_lines)
+        symilar.linesets = [
+            _make_lineset(rel_path, lines),
+            _make_lineset(other, other_lines),
+        ]
+        for commonality in symilar._iter_sims():  # pylint: disable=protected-access
+            start, end = commonality.fst_file_start, commonality.fst_file_end
+            places = sorted(
+                [
+                    f"=={commonality.fst_lset.name}:[{start}:{end}]",
+                    f"=={commonality.snd_lset.name}:"
+                    f"[{commonality.snd_file_start}:{commonality.snd_file_end}]",
+                ]
+            )
+            msg = "\n".join(
+                ["Similar lines in 2 files"]
+                + places
+                + [line.rstrip() for line in source[start:end]]
+            )
+            self.connection.executemany(
+                "INSERT INTO duplicates VALUES (?, ?, ?, ?)",
+                [
+                    (rel_path, other, start + 1, msg),
+                    (other, rel_path, commonality.snd_file_start + 1, msg),
+                ],
+            )
+
+    def get_duplicates(self, files):
+        """
+        Give the duplicate-code messages of each of ``files``.
+
+        :param dict files: path of each file to give messages of, by relative
+            path
+        """
+        duplicates = {}
+        for rel_path, line, msg in self.connection.execute(
+            "SELECT rel_path, line, msg FROM duplicates ORDER BY rel_path, line"
+        ):
+            if rel_path not in files:
+                continue
+            duplicates.setdefault(rel_path, []).append(
+                LintMessage(
+                    msg_id="R0801",
+                    symbol="duplicate-code",
+                    msg=msg,
+                    C="R",
+                    category="refactor",
+                    confidence="UNDEFINED",
+                    abspath=files[rel_path],
+                    path=rel_path,
+                    module=get_module_name(rel_path),
+                    obj="",
+                    line=line,
+                    column=0,
+                )
+            )
+        return duplicates
+
+    def close(self):
+        """Close the database"""
+        self.connection.close()
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+Unit testing module for pytest-pylint baseline.py module
+"""
+from pytest_pylint.baseline import Baseline
+from pytest_pylint.util import LintMessage
+
+
+def make_message(line, msg="Unused import os"):
+    """Make an unused-import message at ``line``"""
+    return LintMessage(symbol="unused-import", msg=msg, obj="", line=line)
+
+
+def test_baseline_counts_occurrences(tmp_path):
+    """Each accepted message only covers as many occurrences as were seen."""
+    baseline = Baseline(tmp_path / "baseline.json")
+    baseline.update("app.py", [make_message(1)], ["import os"])
+    baseline.save()
+
+    baseline = Baseline(tmp_path / "baseline.json")
+    baseline.load()
+    lines = ["", "import os", "import os", "import sys"]
+    messages = [
+        make_message(2),
+        make_message(3),
+        make_message(4, "Unused import sys"),
+    ]
+    assert baseline.get_new("app.py", messages, lines) == messages[1:]
+    assert baseline.get_new("other.py", messages, lines) == messages
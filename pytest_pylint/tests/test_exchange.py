@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+Unit testing module for pytest-pylint exchange.py module
+"""
+import pytest
+
+from pytest_pylint.exchange import ResultExchange
+
+
+@pytest.mark.skipif(not ResultExchange.is_supported("."), reason="needs file locks")
+def test_result_exchange(tmp_path):
+    """Results shared by a worker are read by the others once it is done."""
+    first = ResultExchange(str(tmp_path), "gw0")
+    second = ResultExchange(str(tmp_path), "gw1")
+    first.acquire()
+    first.share("files", {"app.py": {"messages": [], "duration": 1.0}})
+    first.release()
+    assert second.get("gw0", "files") == {"app.py": {"messages": [], "duration": 1.0}}
+    # A worker that stopped early shared nothing
+    assert second.get("gw0", "close") is None
+    assert second.get("gw2", "files") is None
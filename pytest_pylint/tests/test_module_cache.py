@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+Unit testing module for pytest-pylint module_cache.py module
+"""
+import os
+
+from pytest_pylint.module_cache import ModuleCache
+
+
+def test_module_cache_evicts_least_recently_used(tmp_path):
+    """The oldest trees are removed until the cache fits its size."""
+    for age, name in enumerate(["new", "old", "older"]):
+        path = tmp_path / f"{name}.pickle"
+        path.write_bytes(b"x" * 10)
+        os.utime(path, (1000 - age, 1000 - age))
+
+    ModuleCache(tmp_path, 25).evict()
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "new.pickle",
+        "old.pickle",
+    ]
@@ -2,16 +2,45 @@
 """
 Unit testing module for pytest-pylint plugin
 """
+# pylint: disable=too-many-lines
+import json
+import multiprocessing
 import pathlib
+import pstats
 import re
+import socket
+import subprocess
+import sys
 from textwrap import dedent
 from unittest import mock
 
 import pylint.config
+
+# The plugin only imports pylint once enabled. Import it here, before pytester
+# snapshots sys.modules, so in-process runs don't import astroid a second time.
+import pylint.lint  # noqa: F401 pylint: disable=unused-import
 import pytest
 
+from pytest_pylint.daemon import get_socket_path, stop_daemon
+from pytest_pylint.module_cache import ModuleCache
+from pytest_pylint.plugin import PylintPlugin
+from pytest_pylint.pool import lint_files, work
+from pytest_pylint.pylint_util import run_pylint
+from pytest_pylint.result_store import ResultStore
+from pytest_pylint.similarity import SimilarityIndex
+
 pytest_plugins = ("pytester",)  # pylint: disable=invalid-name
 
+# Budget for the cumulative import time of the plugin in microseconds
+IMPORT_TIME_BUDGET = 150000
+
+
+def get_result_store(testdir):
+    """Open the lint results stored by the runs in ``testdir``"""
+    return ResultStore(
+        testdir.tmpdir.join(".pytest_cache", "d", "pylint", "results.sqlite")
+    )
+
 
 def test_basic(testdir):
     """Verify basic pylint checks"""
@@ -25,6 +54,101 @@ def test_basic(testdir):
     assert "Linting files" in result.stdout.str()
 
 
+def test_pylint_only(testdir):
+    """Only pylint checks are collected, test modules aren't imported"""
+    testdir.tmpdir.join("test_app.py").write(
+        '"""Tests."""\nraise RuntimeError("imported")\n'
+    )
+    testdir.mkpydir("pkg").join("__init__.py").write(
+        '"""Package."""\nraise RuntimeError("imported")\n'
+    )
+    testdir.mkdir("build").join("generated.py").write("import os\n")
+    result = testdir.runpytest("--pylint-only", "--pylint-ignore=build", "-v")
+    result.stdout.fnmatch_lines(["*test_app.py::PYLINT PASSED*", "*2 passed*"])
+    assert "imported" not in result.stdout.str()
+    assert "generated.py" not in result.stdout.str()
+
+    result = testdir.runpytest("--pylint", "--pylint-ignore=build")
+    assert "RuntimeError: imported" in result.stdout.str()
+
+
+def test_package_granularity(testdir):
+    """One item checks all the files of a package, caching each of them."""
+    testdir.tmpdir.join("app.py").write('"""App."""\n')
+    pkg = testdir.mkpydir("pkg")
+    pkg.join("__init__.py").write('"""Package."""\n')
+    pkg.join("bad.py").write('"""Bad."""\nimport os\n')
+    pkg.join("good.py").write('"""Good."""\n')
+    result = testdir.runpytest("--pylint", "--pylint-granularity=package", "-v")
+    result.stdout.fnmatch_lines(
+        [
+            "*::PYLINT PASSED*",
+            "pkg::PYLINT FAILED*",
+            "*pkg/bad.py: W:  2, 0: Unused import os (unused-import)",
+            "*1 failed, 1 passed*",
+        ]
+    )
+    # Named after the directory, whatever pytest names the package
+    assert "__init__.py::PYLINT" not in result.stdout.str()
+    assert sorted(get_result_store(testdir).get_paths()) == [
+        "app.py",
+        "pkg/__init__.py",
+        "pkg/bad.py",
+        "pkg/good.py",
+    ]
+
+    pkg.join("bad.py").write('"""Fixed."""\n')
+    result = testdir.runpytest_subprocess(
+        "--pylint", "--pylint-granularity=package", "-v"
+    )
+    result.stdout.fnmatch_lines(["*::PYLINT SKIPPED*", "pkg::PYLINT PASSED*"])
+
+
+@pytest.mark.skipif(not SimilarityIndex.is_supported(), reason="needs pylint 3")
+def test_incremental_duplicates(testdir):
+    """Duplicate code is reported on both files when only one changed."""
+    code = "".join(
+        f"    value_{index} = value * {index}\n    print(value_{index})\n"
+        for index in range(4)
+    )
+    testdir.tmpdir.join("first.py").write(
+        f'"""First."""\n\n\ndef first(value):\n    """First."""\n{code}'
+    )
+    testdir.tmpdir.join("second.py").write('"""Second."""\n')
+    result = testdir.runpytest("--pylint", "--pylint-incremental-duplicates")
+    result.stdout.fnmatch_lines(["*2 passed*"])
+
+    testdir.tmpdir.join("second.py").write(
+        f'"""Second."""\n\n\ndef second(value):\n    """Second."""\n{code}'
+    )
+    args = ["--pylint", "--pylint-incremental-duplicates", "-v"]
+    result = testdir.runpytest_subprocess(*args)
+    result.stdout.fnmatch_lines(
+        [
+            "first.py::PYLINT FAILED*",
+            "second.py::PYLINT FAILED*",
+            "*R:  6, 0: Similar lines in 2 files*",
+            "==first:[[]5:13]",
+            "==second:[[]5:13]",
+        ]
+    )
+    assert "duplicate-code" not in str(get_result_store(testdir).get("first.py"))
+
+    testdir.tmpdir.join("second.py").write('"""Second."""\n')
+    result = testdir.runpytest_subprocess(*args)
+    result.stdout.fnmatch_lines(
+        ["first.py::PYLINT SKIPPED*", "second.py::PYLINT PASSED*"]
+    )
+
+
+def test_incremental_duplicates_unsupported(testdir):
+    """Older pylint versions can't look for duplicates incrementally."""
+    testdir.makepyfile('"""App."""')
+    with mock.patch.object(SimilarityIndex, "is_supported", return_value=False):
+        result = testdir.runpytest("--pylint", "--pylint-incremental-duplicates")
+    result.stderr.fnmatch_lines(["*--pylint-incremental-duplicates needs pylint 3*"])
+
+
 def test_nodeid(testdir):
     """Verify our nodeid adds a suffix"""
     testdir.makepyfile(app="import sys")
@@ -33,6 +157,14 @@ def test_nodeid(testdir):
         assert expected in result.stdout.str()
 
 
+def test_collect_only_skips_linting(testdir):
+    """Nothing is linted when the checks are only collected"""
+    testdir.makepyfile(app="import sys")
+    result = testdir.runpytest("--pylint", "--collect-only")
+    assert "Linting files" not in result.stdout.str()
+    assert "<PyLintItem PYLINT>" in result.stdout.str()
+
+
 def test_nodeid_no_dupepath(testdir):
     """Verify we don't duplicate the node path in our node id."""
     testdir.makepyfile(app="import sys")
@@ -86,6 +218,22 @@ def test_pylintrc_file(testdir):
     assert "Line too long (10/3)" in result.stdout.str()
 
 
+def test_pylintrc_file_with_percent(testdir):
+    """Verify that values with a % in a pylint rc file are read as is."""
+    rcfile = testdir.makefile(
+        ".rc",
+        """
+        [MAIN]
+
+        ignore=test_pylintrc_file_with_percent.py
+        init-hook=import sys; print("%d" % 1)
+        """,
+    )
+    testdir.makepyfile("import sys")
+    result = testdir.runpytest("--pylint", f"--pylint-rcfile={rcfile.strpath}")
+    assert "collected 0 items" in result.stdout.str()
+
+
 def test_pylintrc_file_toml(testdir):
     """Verify that pyproject.toml can be used as a pylint rc file."""
     rcfile = testdir.makefile(
@@ -234,7 +382,7 @@ def test_multiple_jobs(testdir):
     Assert that the jobs argument is passed through to pylint if provided
     """
     testdir.makepyfile("import sys")
-    with mock.patch("pytest_pylint.plugin.lint.Run") as run_mock:
+    with mock.patch("pytest_pylint.pylint_util.lint.Run") as run_mock:
         jobs = 0
         testdir.runpytest("--pylint", f"--pylint-jobs={jobs}")
     assert run_mock.call_count == 1
@@ -246,12 +394,176 @@ def test_no_multiple_jobs(testdir):
     If no jobs argument is specified it should not appear in pylint arguments
     """
     testdir.makepyfile("import sys")
-    with mock.patch("pytest_pylint.plugin.lint.Run") as run_mock:
+    with mock.patch("pytest_pylint.pylint_util.lint.Run") as run_mock:
         testdir.runpytest("--pylint")
     assert run_mock.call_count == 1
     assert "-j" not in run_mock.call_args[0][0]
 
 
+def test_background(testdir):
+    """Verify files linted in the background are reported by their items"""
+    testdir.makepyfile(
+        test_app="import sys\n\ndef test_sys():\n    assert sys",
+        app="import os",
+    )
+    result = testdir.runpytest_subprocess(
+        "--pylint", "--pylint-background", "--pylint-jobs=2"
+    )
+    assert "Linting files in the background" in result.stdout.str()
+    assert "Unused import os" in result.stdout.str()
+    assert "Missing function or method docstring" in result.stdout.str()
+    assert "2 failed, 1 passed" in result.stdout.str()
+
+
+def test_pool(testdir):
+    """Verify linting with the plugin's process pool"""
+    testdir.makepyfile(app="import os", other="import sys")
+    result = testdir.runpytest_subprocess(
+        "--pylint", "--pylint-pool", "--pylint-jobs=2"
+    )
+    assert "Linting files" in result.stdout.str()
+    assert "Unused import os" in result.stdout.str()
+    assert "Unused import sys" in result.stdout.str()
+    assert "2 failed" in result.stdout.str()
+
+    store = get_result_store(testdir)
+    assert all(store.get(rel_path)["duration"] > 0 for rel_path in store.get_paths())
+
+
+@pytest.mark.parametrize(
+    "args",
+    (
+        ("--pylint-pool", "--pylint-jobs=2"),
+        ("--pylint-background",),
+        ("-n", "2"),
+        ("--maxfail=2",),
+    ),
+    ids=["pool", "background", "xdist", "maxfail"],
+)
+def test_cyclic_imports_across_parts(testdir, args):
+    """Verify messages about several files are found when linting in parts"""
+    if "-n" in args:
+        pytest.importorskip("xdist")
+    testdir.tmpdir.join("c.py").write('"""C."""\n')
+    testdir.tmpdir.join("a.py").write('"""A."""\nimport b\n\nprint(b)\n')
+    testdir.tmpdir.join("b.py").write('"""B."""\nimport a\n\nprint(a)\n')
+    result = testdir.runpytest_subprocess("--pylint", *args)
+    assert "Cyclic import (a -> b)" in result.stdout.str()
+    assert "1 failed, 2 passed" in result.stdout.str()
+
+
+@pytest.mark.parametrize(
+    "args, streamed",
+    [
+        (["--enable=cyclic-import"], False),
+        ([], True),
+        (["--load-plugins=close_checker"], False),
+        (["--load-plugins=close_checker", "--disable=closed"], True),
+    ],
+    ids=["cyclic-import", "default", "plugin", "plugin-disabled"],
+)
+def test_lint_files_streams_results(testdir, args, streamed):
+    """Results are given as soon as a file is linted, unless pylint may add more."""
+    testdir.makepyfile(a="import os", b="import sys")
+    testdir.makepyfile(
+        close_checker="""
+        from pylint.checkers import BaseChecker
+
+        class CloseChecker(BaseChecker):
+            name = "close-checker"
+            msgs = {"W9901": ("Closed", "closed", "Reported once closed.")}
+
+            def close(self):
+                pass
+
+        def register(linter):
+            linter.register_checker(CloseChecker(linter))
+        """
+    )
+    testdir.syspathinsert()
+    during_lint = []
+    done = []
+
+    def run(*args):
+        result = run_pylint(*args)
+        done.append(True)
+        return result
+
+    with mock.patch("pytest_pylint.pool.run_pylint", side_effect=run):
+        results = lint_files(
+            ["a.py", "b.py"],
+            ["--disable=duplicate-code,cyclic-import"] + args,
+            on_result=lambda path, result: during_lint.append(not done),
+        )
+    assert during_lint == [streamed, streamed]
+    assert [len(result["messages"]) for result in results.values()] == [3, 3]
+
+
+@pytest.mark.parametrize(
+    "recycle_option",
+    ("--pylint-files-per-worker=1", "--pylint-max-memory=1"),
+    ids=["files-per-worker", "max-memory"],
+)
+def test_pool_recycles_workers(testdir, recycle_option):
+    """Verify results stay complete when lint workers are replaced"""
+    testdir.makepyfile(app="import os", other="import sys", third="import re")
+    result = testdir.runpytest_subprocess("--pylint", "--pylint-jobs=1", recycle_option)
+    assert "Unused import os" in result.stdout.str()
+    assert "Unused import sys" in result.stdout.str()
+    assert "Unused import re" in result.stdout.str()
+    assert "3 failed" in result.stdout.str()
+
+
+@pytest.mark.parametrize(
+    "memory, retire",
+    [([2**30, 2**30 + 2**19], False), ([2**20, 2**21], True)],
+    ids=["started-large", "grew"],
+)
+def test_worker_retires_on_memory_growth(testdir, memory, retire):
+    """Lint workers only count the memory they used since they started"""
+    testdir.makepyfile(app="import os")
+    conn, child_conn = multiprocessing.Pipe()
+    conn.send((["app.py"], None))
+    conn.send(None)
+    with mock.patch("pytest_pylint.pool.get_memory", side_effect=memory):
+        work(child_conn, {"pylint_args": []}, None, 2**20)
+    assert conn.recv()[0] == "result"
+    assert conn.recv() == ("done", None, retire)
+
+
+def test_xdist(testdir):
+    """
+    Verify xdist workers lint the files of their items and the controller
+    caches the results of all of them.
+    """
+    pytest.importorskip("xdist")
+    testdir.makepyfile(app="import os", other="import sys")
+    result = testdir.runpytest_subprocess("--pylint", "-n", "2")
+    assert "Unused import os" in result.stdout.str()
+    assert "Unused import sys" in result.stdout.str()
+    assert "2 failed" in result.stdout.str()
+
+    assert sorted(get_result_store(testdir).get_paths()) == ["app.py", "other.py"]
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+def test_daemon(testdir):
+    """Verify the lint daemon is reused and notices changed files"""
+    testdir.makepyfile(app="import os")
+    socket_path = get_socket_path(testdir.tmpdir.join(".pytest_cache", "d", "pylint"))
+    try:
+        result = testdir.runpytest_subprocess("--pylint", "--pylint-daemon")
+        assert "Unused import os" in result.stdout.str()
+        assert pathlib.Path(socket_path).exists()
+
+        testdir.tmpdir.join("app.py").write("import sys")
+        result = testdir.runpytest_subprocess("--pylint", "--pylint-daemon")
+        assert "Unused import sys" in result.stdout.str()
+        assert "Unused import os" not in result.stdout.str()
+    finally:
+        stop_daemon(socket_path)
+
+
 def test_skip_checked_files(testdir):
     """
     Test a file twice which can pass pylint.
@@ -278,6 +590,337 @@ def test_skip_checked_files(testdir):
     assert "1 passed" in result.stdout.str()
 
 
+def test_cache_failing_files(testdir):
+    """
+    Files with known messages are answered from the cache instead of being
+    linted again.
+    """
+    testdir.makepyfile("import sys")
+    result = testdir.runpytest("--pylint")
+    assert "1 failed" in result.stdout.str()
+
+    with mock.patch("pytest_pylint.pylint_util.lint.Run") as run_mock:
+        result = testdir.runpytest("--pylint")
+    assert run_mock.call_count == 0
+    assert "1 failed" in result.stdout.str()
+    assert "Unused import sys" in result.stdout.str()
+
+
+def test_cache_uses_content_hash(testdir):
+    """A changed mtime alone shouldn't invalidate the cache."""
+    pyfile = testdir.makepyfile("")
+    pyfile.write('"""hi."""\n')
+    result = testdir.runpytest("--pylint")
+    assert "1 passed" in result.stdout.str()
+
+    pyfile.setmtime(pyfile.mtime() + 10)
+    result = testdir.runpytest("--pylint")
+    assert "1 skipped" in result.stdout.str()
+
+    pyfile.write('"""hi."""\nimport sys\n')
+    # astroid caches modules in process, so lint the new contents in a new one
+    result = testdir.runpytest_subprocess("--pylint")
+    assert "1 failed" in result.stdout.str()
+
+
+@pytest.mark.parametrize("args", [[], ["-n", "2"]], ids=["serial", "xdist"])
+def test_cache_prunes_removed_files(testdir, args):
+    """Results of files that are gone are dropped, the others stay stored."""
+    if "-n" in args:
+        pytest.importorskip("xdist")
+    testdir.makepyfile(app="import os", other="import sys")
+    testdir.runpytest_subprocess("--pylint", *args)
+    assert sorted(get_result_store(testdir).get_paths()) == ["app.py", "other.py"]
+
+    testdir.tmpdir.join("other.py").remove()
+    testdir.runpytest_subprocess("--pylint", *args)
+    assert get_result_store(testdir).get_paths() == ["app.py"]
+
+
+def test_xdist_worker_crash(testdir):
+    """A crashed pytest-xdist worker fails its test, not the whole session"""
+    pytest.importorskip("xdist")
+    testdir.tmpdir.join("test_crash.py").write(
+        '"""Crash."""\nimport os\n\n\ndef test_crash():\n'
+        '    """Crash."""\n    os._exit(1)\n'
+    )
+    result = testdir.runpytest_subprocess("--pylint", "-n", "1")
+    assert "INTERNALERROR" not in result.stdout.str()
+    result.assert_outcomes(passed=1, failed=1)
+
+
+def test_changed_since(testdir):
+    """Only files changed since a git reference and their importers are linted."""
+    files = {
+        "a.py": '"""Unchanged."""\n',
+        "b.py": '"""Uses c."""\nfrom c import VALUE\n\nprint(VALUE)\n',
+        "c.py": '"""Changed later."""\nVALUE = 1\n',
+    }
+    for name, source in files.items():
+        testdir.tmpdir.join(name).write(source)
+
+    def git(*args):
+        subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@example.com"]
+            + list(args),
+            cwd=str(testdir.tmpdir),
+            check=True,
+            capture_output=True,
+        )
+
+    git("init")
+    git("add", "a.py", "b.py", "c.py")
+    git("commit", "-m", "initial")
+    testdir.tmpdir.join("c.py").write('"""Changed."""\nVALUE = 2\n')
+    testdir.tmpdir.join("d.py").write('"""Untracked."""\n')
+
+    result = testdir.runpytest("--pylint", "--pylint-changed-since=HEAD", "-rs")
+    result.stdout.fnmatch_lines(["*file unchanged since HEAD*"])
+    assert "2 passed, 2 skipped" in result.stdout.str()
+
+    result = testdir.runpytest(
+        "--pylint",
+        "--pylint-changed-since=HEAD",
+        "--pylint-changed-dependents",
+        "--cache-clear",
+    )
+    assert "3 passed, 1 skipped" in result.stdout.str()
+
+    result = testdir.runpytest("--pylint", "--pylint-changed-since=nope")
+    assert "--pylint-changed-since=nope" in result.stderr.str()
+
+
+def test_shard(testdir):
+    """Every file is linted and reported by exactly one shard."""
+    for name in "abcd":
+        testdir.tmpdir.join(f"{name}.py").write(f'"""{name}."""\n')
+    reported = []
+    for shard in "1/2", "2/2":
+        result = testdir.runpytest(
+            "--pylint", f"--pylint-shard={shard}", "--cache-clear", "-v"
+        )
+        assert "2 passed, 2 deselected" in result.stdout.str()
+        reported += re.findall(r"^(\w\.py)::PYLINT PASSED", result.stdout.str(), re.M)
+    assert sorted(reported) == ["a.py", "b.py", "c.py", "d.py"]
+
+    result = testdir.runpytest("--pylint", "--pylint-shard=3/2")
+    assert "expected i/n with 1 <= i <= n" in result.stderr.str()
+
+
+@pytest.mark.parametrize(
+    "args",
+    [["--pylint-jobs=1"], ["--pylint-pool"], ["-n", "2"]],
+    ids=["jobs", "pool", "xdist"],
+)
+def test_durations(testdir, args):
+    """The slowest files and checkers are reported and saved."""
+    if "-n" in args:
+        pytest.importorskip("xdist")
+    testdir.makepyfile(app="import os")
+    result = testdir.runpytest_subprocess(
+        "--pylint",
+        *args,
+        "--pylint-durations=3",
+        "--pylint-durations-json=durations.json",
+    )
+    result.stdout.fnmatch_lines(
+        [
+            "*= slowest 3 pylint files =*",
+            "*s app.py",
+            "*= slowest 3 pylint checkers =*",
+        ]
+    )
+    with open(testdir.tmpdir.join("durations.json"), encoding="utf-8") as _file:
+        durations = json.load(_file)
+    assert list(durations["files"]) == ["app.py"]
+    assert "imports" in durations["checkers"]
+
+
+@pytest.mark.parametrize("pool_option", ["--pylint-jobs=1", "--pylint-pool"])
+def test_profile(testdir, pool_option):
+    """Linting is profiled into one file, along with its collapsed stacks."""
+    testdir.makepyfile(app="import os", other="import sys")
+    testdir.runpytest_subprocess(
+        "--pylint",
+        pool_option,
+        "--pylint-profile=lint.prof",
+        "--pylint-profile-collapsed=lint.folded",
+    )
+    assert sorted(path.basename for path in testdir.tmpdir.listdir("lint.*")) == [
+        "lint.folded",
+        "lint.prof",
+    ]
+    stats = pstats.Stats(str(testdir.tmpdir.join("lint.prof")))
+    assert any(name == "check" for _, _, name in stats.stats)
+    stacks = testdir.tmpdir.join("lint.folded").read().splitlines()
+    assert any(
+        re.match(r"^\S.*;check \(pylinter\.py:\d+\);.* \d+$", line) for line in stacks
+    )
+
+
+@pytest.mark.skipif(not ModuleCache.is_supported(), reason="needs astroid 4")
+def test_astroid_cache(testdir):
+    """Astroid trees are kept on disk and reused once enabled."""
+    testdir.makepyfile(
+        app='''
+        """Fails on purpose."""
+        import argparse
+
+        argparse.ArgumentParser().parse_argz()
+        '''
+    )
+    cache_dir = testdir.tmpdir.join(".pytest_cache", "d", "pylint", "astroid")
+    for _ in range(2):
+        result = testdir.runpytest_subprocess(
+            "--pylint",
+            "--pylint-error-types=E",
+            "--pylint-astroid-cache-size=256",
+            "--cache-clear",
+        )
+        assert "no-member" in result.stdout.str()
+        assert cache_dir.listdir("*.pickle")
+
+    result = testdir.runpytest_subprocess("--pylint", "--cache-clear")
+    assert "no-member" in result.stdout.str()
+    assert not cache_dir.exists()
+
+
+def test_astroid_cache_unsupported(testdir):
+    """The astroid cache is left out with a warning on older astroid versions."""
+    testdir.makepyfile("import sys")
+    with mock.patch.object(ModuleCache, "is_supported", return_value=False):
+        result = testdir.runpytest("--pylint", "--pylint-astroid-cache-size=256")
+    result.stdout.fnmatch_lines(["*--pylint-astroid-cache-size needs astroid 4*"])
+    assert "1 failed" in result.stdout.str()
+    cache_dir = testdir.tmpdir.join(".pytest_cache", "d", "pylint", "astroid")
+    assert not cache_dir.exists()
+
+
+def test_cache_keeps_categories(testdir):
+    """Only messages of the error types are kept, cached results say which."""
+    testdir.tmpdir.join("app.py").write("import os\n")
+    result = testdir.runpytest("--pylint", "--pylint-error-types=W")
+    assert "Unused import os" in result.stdout.str()
+    assert "Missing module docstring" not in result.stdout.str()
+    entry = get_result_store(testdir).get("app.py")
+    assert entry["categories"] == "W"
+    assert [message["symbol"] for message in entry["messages"]] == ["unused-import"]
+
+    result = testdir.runpytest("--pylint", "--pylint-error-types=CW")
+    assert "Missing module docstring" in result.stdout.str()
+
+
+def test_baseline(testdir):
+    """Only messages missing from the baseline fail, it is updated on demand."""
+    testdir.tmpdir.join("app.py").write('"""App."""\nimport os\n')
+    result = testdir.runpytest("--pylint", "--pylint-baseline=baseline.json")
+    assert "create it with --pylint-baseline-update" in result.stderr.str()
+
+    result = testdir.runpytest_subprocess(
+        "--pylint", "--pylint-baseline=baseline.json", "--pylint-baseline-update"
+    )
+    assert "1 passed" in result.stdout.str()
+    baseline = json.loads(testdir.tmpdir.join("baseline.json").read())
+    assert [entry["symbol"] for entry in baseline["files"]["app.py"]] == [
+        "unused-import"
+    ]
+
+    # The accepted message moved down a line, the new one fails
+    testdir.tmpdir.join("app.py").write('"""App."""\nimport re\n\nimport os\n')
+    result = testdir.runpytest_subprocess("--pylint", "--pylint-baseline=baseline.json")
+    assert "Unused import re" in result.stdout.str()
+    assert "Unused import os" not in result.stdout.str()
+    assert "1 failed" in result.stdout.str()
+
+
+def test_fail_fast(testdir):
+    """With --maxfail the files likely to fail are linted first, and only those."""
+    for mtime, name in enumerate("abc"):
+        pyfile = testdir.tmpdir.join(f"{name}.py")
+        pyfile.write(f'"""{name}."""\n')
+        pyfile.setmtime(1000000 + mtime)
+    testdir.tmpdir.join("a.py").write('"""Fails."""\nimport os\n')
+    result = testdir.runpytest("--pylint")
+    assert "1 failed, 2 passed" in result.stdout.str()
+    assert testdir.tmpdir.join(".pytest_cache", "v", "pylint", "failures").exists()
+
+    # a.py failed last time, then c.py is the newest file
+    result = testdir.runpytest(
+        "--pylint", "-x", "--cache-clear", "--pylint-durations-json=times.json"
+    )
+    result.stdout.fnmatch_lines(["a.py F*"])
+    assert "1 failed" in result.stdout.str()
+    with open(testdir.tmpdir.join("times.json"), encoding="utf-8") as _file:
+        assert list(json.load(_file)["files"]) == ["a.py"]
+
+    testdir.tmpdir.join("a.py").write('"""Fixed."""\n')
+    testdir.tmpdir.join("b.py").write('"""Fails."""\nimport os\n')
+    # Astroid would keep the trees of the previous run in this process
+    result = testdir.runpytest_subprocess("--pylint", "--maxfail=1", "-v")
+    result.stdout.fnmatch_lines(
+        ["a.py::PYLINT PASSED*", "b.py::PYLINT FAILED*", "*1 failed, 1 passed*"]
+    )
+
+
+def test_fail_fast_defers_cross_file_pass(testdir):
+    """With -x, all the files are linted together only once a check may pass."""
+    for mtime, (name, source) in enumerate(
+        [
+            ("a", '"""A."""\nimport b\n\nprint(b)\n'),
+            ("b", '"""B."""\nimport a\n\nprint(a)\n'),
+            ("c", '"""Fails."""\nimport os\n'),
+        ]
+    ):
+        pyfile = testdir.tmpdir.join(f"{name}.py")
+        pyfile.write(source)
+        pyfile.setmtime(1000000 + mtime)
+    with mock.patch.object(
+        PylintPlugin,
+        "_lint_files",
+        autospec=True,
+        side_effect=PylintPlugin._lint_files,  # pylint: disable=protected-access
+    ) as mocked:
+        result = testdir.runpytest("--pylint", "-x")
+    assert "1 failed" in result.stdout.str()
+    assert [call.kwargs.get("msg_ids") for call in mocked.call_args_list] == [None]
+    # Its result misses the messages about several files
+    assert get_result_store(testdir).get("c.py") is None
+
+    result = testdir.runpytest_subprocess("--pylint")
+    assert "Cyclic import (a -> b)" in result.stdout.str()
+
+
+def test_invalidate_cache_of_dependents(testdir):
+    """Files importing a changed file are linted again."""
+    testdir.makepyfile(
+        a='''
+        """Uses b."""
+        from b import Thing
+
+        Thing().run()
+        ''',
+        b='''
+        """Provides Thing."""
+
+
+        class Thing:
+            """A thing."""
+
+            def run(self):
+                """Run it."""
+        ''',
+    )
+    result = testdir.runpytest_subprocess("--pylint", "--pylint-error-types=E")
+    assert "2 passed" in result.stdout.str()
+
+    testdir.tmpdir.join("b.py").write(
+        testdir.tmpdir.join("b.py").read().replace("def run", "def walk")
+    )
+    result = testdir.runpytest_subprocess("--pylint", "--pylint-error-types=E")
+    assert "1 failed, 1 passed" in result.stdout.str()
+    assert "Instance of 'Thing' has no 'run' member" in result.stdout.str()
+
+
 def test_invalidate_cache_when_config_changes(testdir):
     """If pylintrc changes, no cache should apply."""
     rcfile = testdir.makefile(
@@ -308,6 +951,111 @@ def test_invalidate_cache_when_config_changes(testdir):
     assert "1 failed" in result.stdout.str()
 
 
+def test_keep_cache_when_config_only_looks_different(testdir):
+    """Edits that don't change the pylint configuration keep the cache."""
+    testdir.tmpdir.join("pyproject.toml").write(
+        '[tool.pylint."messages control"]\n'
+        'disable = ["missing-final-newline", "invalid-name"]\n'
+    )
+    testdir.makepyfile('"""hi."""')
+    rcfile = "--pylint-rcfile=pyproject.toml"
+    result = testdir.runpytest("--pylint", rcfile)
+    assert "1 passed" in result.stdout.str()
+
+    testdir.tmpdir.join("pyproject.toml").write(
+        "[tool.black]\nline-length = 88\n\n"
+        "[tool.pylint.MESSAGES_CONTROL]\n"
+        "# Both are fine here\n"
+        'disable = ["invalid-name", "missing-final-newline"]\n'
+    )
+    result = testdir.runpytest("--pylint", rcfile)
+    assert "1 skipped" in result.stdout.str()
+
+    testdir.tmpdir.join("pyproject.toml").write(
+        '[tool.pylint.MESSAGES_CONTROL]\ndisable = ["invalid-name"]\n'
+    )
+    result = testdir.runpytest("--pylint", rcfile)
+    assert "1 failed" in result.stdout.str()
+
+
+def test_only_lint_for_newly_enabled_messages(testdir):
+    """Unchanged files are only linted for newly enabled messages."""
+    rcfile = testdir.tmpdir.join("pylintrc")
+    rcfile.write("[MESSAGES CONTROL]\ndisable=unused-import,line-too-long\n")
+    testdir.tmpdir.join("app.py").write(f'"""App."""\nimport os\n# {"-" * 100}\n')
+    args = ["--pylint", f"--pylint-rcfile={rcfile}"]
+    result = testdir.runpytest(*args)
+    assert "1 passed" in result.stdout.str()
+
+    rcfile.write("[MESSAGES CONTROL]\ndisable=line-too-long\n")
+    result = testdir.runpytest_subprocess(*args)
+    result.stdout.fnmatch_lines(
+        [
+            "Linting 1 unchanged files for newly enabled messages",
+            "*Unused import os (unused-import)",
+            "*1 failed*",
+        ]
+    )
+    assert "Line too long" not in result.stdout.str()
+    assert "Linting files" not in result.stdout.str()
+
+    rcfile.write("[MESSAGES CONTROL]\ndisable=unused-import,line-too-long\n")
+    result = testdir.runpytest_subprocess(*args)
+    assert "1 skipped" in result.stdout.str()
+    assert "Linting" not in result.stdout.str()
+
+
+def test_relint_on_options_of_other_checkers(testdir):
+    """Changing an option lints everything again, checkers read each other's."""
+    rcfile = testdir.tmpdir.join("pylintrc")
+    rcfile.write("[VARIABLES]\nignored-argument-names=_.*\n")
+    testdir.tmpdir.join("app.py").write(
+        '"""App."""\n\n\ndef func(_a, _b, _c, _d, _e, _f):\n    """Func."""\n'
+    )
+    args = ["--pylint", f"--pylint-rcfile={rcfile}"]
+    result = testdir.runpytest(*args)
+    assert "1 passed" in result.stdout.str()
+
+    # The design checker counts arguments without the ignored ones
+    rcfile.write("[VARIABLES]\nignored-argument-names=zzz\n")
+    result = testdir.runpytest(*args)
+    assert "too-many-arguments" in result.stdout.str()
+    assert "1 failed" in result.stdout.str()
+
+    rcfile.write("[VARIABLES]\nignored-argument-names=_.*\n")
+    result = testdir.runpytest(*args)
+    assert "1 passed" in result.stdout.str()
+
+
+def test_xdist_lints_for_newly_enabled_messages(testdir):
+    """Unchanged files are linted for newly enabled messages by one worker."""
+    pytest.importorskip("xdist")
+    rcfile = testdir.tmpdir.join("pylintrc")
+    rcfile.write("[MESSAGES CONTROL]\ndisable=unused-import\n")
+    testdir.tmpdir.join("app.py").write('"""App."""\nimport os\n')
+    testdir.tmpdir.join("other.py").write('"""Other."""\nimport sys\n')
+    args = ["--pylint", f"--pylint-rcfile={rcfile}", "-n", "2"]
+    result = testdir.runpytest_subprocess(*args)
+    assert "2 passed" in result.stdout.str()
+
+    rcfile.write("[MESSAGES CONTROL]\ndisable=\n")
+    result = testdir.runpytest_subprocess(*args)
+    assert "Unused import os" in result.stdout.str()
+    assert "Unused import sys" in result.stdout.str()
+    assert "2 failed" in result.stdout.str()
+
+
+def test_message_states_stored_without_rcfile(testdir):
+    """The message states of pylint's default configuration are reused."""
+    testdir.tmpdir.join("app.py").write('"""App."""\n')
+    testdir.runpytest("--pylint")
+    testdir.tmpdir.join("app.py").write('"""Changed."""\n')
+    with mock.patch("pytest_pylint.pylint_util.get_message_states") as get_states:
+        result = testdir.runpytest("--pylint")
+    assert "1 passed" in result.stdout.str()
+    get_states.assert_not_called()
+
+
 def test_output_file(testdir):
     """Verify pylint report output"""
     testdir.makepyfile("import sys")
@@ -347,6 +1095,42 @@ def test_output_file_makes_dirs(testdir):
     testdir.runpytest("--pylint", f"--pylint-output-file={output_path}")
 
 
+def test_output_format(testdir):
+    """Verify the JSON Lines and SARIF reports"""
+    testdir.tmpdir.join("app.py").write('"""App."""\nimport sys\n')
+    result = testdir.runpytest_subprocess(
+        "--pylint", "--pylint-output-file=pylint.jsonl", "--pylint-output-format=jsonl"
+    )
+    result.assert_outcomes(failed=1)
+    messages = [
+        json.loads(line) for line in testdir.tmpdir.join("pylint.jsonl").readlines()
+    ]
+    assert [(message["path"], message["symbol"]) for message in messages] == [
+        ("app.py", "unused-import")
+    ]
+
+    pytest.importorskip("xdist")
+    result = testdir.runpytest_subprocess(
+        "--pylint",
+        "--cache-clear",
+        "--pylint-output-file=pylint.sarif",
+        "--pylint-output-format=sarif",
+        "-n",
+        "2",
+    )
+    # The report is written before the cache, which must not fail either
+    result.assert_outcomes(failed=1)
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    (run,) = json.loads(testdir.tmpdir.join("pylint.sarif").read())["runs"]
+    assert run["tool"]["driver"]["rules"] == [{"id": "W0611", "name": "unused-import"}]
+    (result,) = run["results"]
+    assert result["level"] == "warning"
+    assert result["locations"][0]["physicalLocation"] == {
+        "artifactLocation": {"uri": "app.py"},
+        "region": {"startLine": 2, "startColumn": 1, "endLine": 2, "endColumn": 11},
+    }
+
+
 @pytest.mark.parametrize(
     "arg_opt_name, arg_opt_value",
     [("ignore", "test_cmd_line_ignore.py"), ("ignore-patterns", ".+_ignore.py")],
@@ -393,3 +1177,36 @@ def test_cmd_line_ignore_pri(testdir, arg_opt_name, arg_opt_value, sectionname):
 
     assert "collected 1 item" in result.stdout.str()
     assert "Unused import sys" in result.stdout.str()
+
+
+def test_import_time():
+    """
+    Importing the plugin, which every pytest run does, must not import
+    pylint or astroid and must stay within its import time budget.
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import pytest; import pytest_pylint.plugin",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, module = line.rsplit("|", 2)
+        if cumulative.strip().isdigit():
+            import_times[module.strip()] = int(cumulative)
+
+    assert not [
+        module
+        for module in import_times
+        if module.split(".")[0] in ("pylint", "astroid", "tomli", "tomllib")
+    ]
+    assert import_times["pytest_pylint.plugin"] < IMPORT_TIME_BUDGET
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+Unit testing module for pytest-pylint rcfile.py module
+"""
+from pytest_pylint.rcfile import normalize_config, parse_config
+
+
+def test_normalize_config():
+    """INI and TOML spellings of the same configuration are the same."""
+    ini = parse_config(
+        b"[MASTER]\njobs = 2\n\n"
+        b"[MESSAGES CONTROL]\n# Legacy code\ndisable =\n  invalid-name,\n  C0114\n",
+        toml=False,
+    )
+    toml = parse_config(
+        b'[tool.pylint.messages_control]\ndisable = ["C0114", "invalid-name"]\n'
+        b'[tool.pylint.main]\njobs = "2"\n',
+        toml=True,
+    )
+    assert normalize_config(ini) == normalize_config(toml) == {
+        "main": {"jobs": "2"},
+        "messages control": {"disable": ["C0114", "invalid-name"]},
+    }
+    assert parse_config(b"[tool.black]\n", toml=True) is None
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Unit testing module for pytest-pylint result_store.py module
+"""
+from pytest_pylint.result_store import ResultStore
+
+
+def test_result_store_keeps_newest(tmp_path):
+    """The results written longest ago are dropped beyond the size cap."""
+    store = ResultStore(tmp_path / "results.sqlite", max_results=2)
+    store.validate("config")
+    for rel_path in ["old.py", "new.py", "newer.py"]:
+        store.save({rel_path: {"messages": []}})
+    store.save({}, removed=["newer.py"])
+    assert store.get_paths() == ["new.py"]
+    assert store.get("new.py") == {"messages": []}
+    assert store.get("old.py") is None
+    store.close()
+
+
+def test_result_store_validate(tmp_path):
+    """Results of another configuration are dropped."""
+    store = ResultStore(tmp_path / "results.sqlite")
+    store.validate("config")
+    store.save({"app.py": {"messages": []}})
+    store.validate("config")
+    assert store.get_paths() == ["app.py"]
+    store.validate("other")
+    assert store.get_paths() == []
+    store.close()
+
+
+def test_result_store_rebuilds_corrupt_database(tmp_path):
+    """A file that isn't a database is replaced by an empty store."""
+    path = tmp_path / "results.sqlite"
+    path.write_bytes(b"not a database" * 100)
+    store = ResultStore(path)
+    assert store.get_paths() == []
+    store.close()
+
+
+def test_result_store_keeps_recent_message_states(tmp_path):
+    """Message states of the most recent configurations are kept."""
+    store = ResultStore(tmp_path / "results.sqlite")
+    store.validate("versions")
+    for index in range(12):
+        store.save_states(f"config{index}", {"W0611": str(index)})
+    assert store.get_states("config1") is None
+    assert store.get_states("config2") == {"W0611": "2"}
+    store.save_states("config2", {"W0611": "again"})
+    store.save_states("config12", {})
+    assert store.get_states("config2") == {"W0611": "again"}
+    assert store.get_states("config3") is None
+    store.validate("other versions")
+    assert store.get_states("config2") is None
+    store.close()
+
+
+def test_result_store_reconnects_after_removal(tmp_path):
+    """A database removed under the store is created again and validated."""
+    path = tmp_path / "pylint" / "results.sqlite"
+    path.parent.mkdir()
+    store = ResultStore(path)
+    store.validate("config")
+    store.save({"old.py": {"messages": []}})
+    path.unlink()
+    path.parent.rmdir()
+    store.save({"app.py": {"messages": []}})
+    store.close()
+
+    store = ResultStore(path)
+    store.validate("config")
+    assert store.get_paths() == ["app.py"]
+    store.close()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Unit testing module for pytest-pylint similarity.py module
+"""
+from configparser import ConfigParser
+
+import pytest
+
+from pytest_pylint.similarity import SimilarityIndex, get_similarity_options
+
+pytestmark = pytest.mark.skipif(  # pylint: disable=invalid-name
+    not SimilarityIndex.is_supported(), reason="needs pylint 3"
+)
+
+CODE = "".join(f"value_{index} = {index}\nprint(value_{index})\n" for index in range(4))
+
+
+def test_similarity_options():
+    """Options come from the configuration, and disabling the message wins."""
+    pylint_config = ConfigParser()
+    pylint_config.read_string(
+        "[SIMILARITIES]\nmin-similarity-lines=6\nignore-imports=no\n"
+    )
+    options = get_similarity_options(pylint_config)
+    assert options["min-similarity-lines"] == 6
+    assert options["ignore-imports"] is False
+    assert options["ignore-comments"] is True
+
+    options = get_similarity_options(
+        {"messages_control": {"disable": ["missing-docstring", "duplicate-code"]}}
+    )
+    assert options["min-similarity-lines"] == 0
+
+
+def test_index_only_compares_changed_files(tmp_path):
+    """Duplicates with unchanged files are kept until one of them changes."""
+    for name, content in ("a.py", CODE), ("b.py", CODE), ("c.py", "print(1)\n"):
+        tmp_path.joinpath(name).write_text(content)
+    files = {name: (name, str(tmp_path / name)) for name in ("a.py", "b.py", "c.py")}
+    index = SimilarityIndex(tmp_path / "index.sqlite", get_similarity_options(None))
+    index.update(files, str(tmp_path))
+    duplicates = index.get_duplicates(files)
+    assert sorted(duplicates) == ["a.py", "b.py"]
+    assert duplicates["a.py"][0].msg.splitlines()[:3] == [
+        "Similar lines in 2 files",
+        "==a:[0:8]",
+        "==b:[0:8]",
+    ]
+
+    # Unchanged files aren't read again
+    files["a.py"] = ("a.py", str(tmp_path / "missing.py"))
+    index.update(files, str(tmp_path))
+    assert sorted(index.get_duplicates(files)) == ["a.py", "b.py"]
+
+    tmp_path.joinpath("b.py").write_text("print(2)\n")
+    files["b.py"] = ("changed", str(tmp_path / "b.py"))
+    index.update(files, str(tmp_path))
+    assert not index.get_duplicates(files)
+    index.close()
@@ -2,7 +2,18 @@
 """
 Unit testing module for pytest-pylint util.py module
 """
-from pytest_pylint.util import get_rel_path, should_include_file
+from os import sep
+
+from pytest_pylint.util import (
+    FileFilter,
+    get_dependents,
+    get_imported_modules,
+    get_module_names,
+    get_rel_path,
+    get_shard,
+    schedule_batches,
+    should_include_file,
+)
 
 
 def test_get_rel_path():
@@ -61,3 +72,101 @@ def test_pylint_ignore_patterns():
     assert should_include_file("part", [], ignore_patterns) is False
     assert should_include_file("1part2", [], ignore_patterns) is True
     assert should_include_file("base.py", [], ignore_patterns) is False
+
+
+def test_file_filter_remembers_ignored_dirs():
+    """Directories are only checked against the ignore list once."""
+    file_filter = FileFilter(["build"], ["^docs"])
+    assert file_filter.includes(sep.join(["src", "build", "a", "b.py"])) is False
+    assert file_filter.includes(sep.join(["src", "build", "c.py"])) is False
+    assert file_filter.includes(sep.join(["src", "c.py"])) is True
+    assert file_filter.includes(sep.join(["docs", "conf.py"])) is False
+    assert file_filter.ignored_dirs == {
+        "": False,
+        "src": False,
+        sep.join(["src", "build"]): True,
+        sep.join(["src", "build", "a"]): True,
+        "docs": False,
+    }
+
+
+def test_get_module_names():
+    """Every suffix of the dotted path is a candidate module name."""
+    assert get_module_names(sep.join(["a", "b", "c.py"])) == ["a.b.c", "b.c", "c"]
+    assert get_module_names(sep.join(["a", "b", "__init__.py"])) == ["a.b", "b"]
+    assert get_module_names("c.py") == ["c"]
+
+
+def test_get_imported_modules():
+    """Absolute, relative and from imports are all resolved to dotted names."""
+    source = "\n".join(
+        [
+            "import os.path",
+            "from json import decoder",
+            "from . import sibling",
+            "from ..other import thing",
+            "def func():",
+            "    import lazy",
+        ]
+    )
+    rel_path = sep.join(["pkg", "sub", "mod.py"])
+    assert get_imported_modules(source, rel_path) == [
+        "json",
+        "json.decoder",
+        "lazy",
+        "os",
+        "os.path",
+        "pkg",
+        "pkg.other",
+        "pkg.other.thing",
+        "pkg.sub",
+        "pkg.sub.sibling",
+    ]
+    assert not get_imported_modules("import (", rel_path)
+
+
+def test_get_dependents():
+    """Dependents are found transitively through the reverse import graph."""
+    imports = {
+        "a.py": ["b"],
+        "b.py": ["pkg.c"],
+        sep.join(["pkg", "c.py"]): [],
+        "d.py": ["os"],
+    }
+    assert get_dependents({sep.join(["pkg", "c.py"])}, imports) == {"a.py", "b.py"}
+    assert get_dependents({"a.py"}, imports) == set()
+    assert get_dependents({"d.py"}, imports) == set()
+
+
+def test_schedule_batches():
+    """Large files run first on their own and small ones are batched."""
+    costs = {"big": 5, "medium": 2, "small": 0.5, "tiny": 0.5, "rest": 0.25}
+    assert schedule_batches(costs, 1) == [
+        ["big"],
+        ["medium"],
+        ["small", "tiny"],
+        ["rest"],
+    ]
+    assert schedule_batches(costs, 10) == [["big", "medium", "small", "tiny", "rest"]]
+    assert schedule_batches(costs, 10, max_files=2) == [
+        ["big", "medium"],
+        ["small", "tiny"],
+        ["rest"],
+    ]
+    assert not schedule_batches({}, 1)
+
+
+def test_get_shard():
+    """Verify files are split into contiguous shards of about the same cost."""
+    costs = {"a.py": 3, "b.py": 1, "c.py": 1, "d.py": 1, "e.py": 2}
+    shards = [get_shard(costs, index, 2) for index in (1, 2)]
+    assert shards == [{"a.py", "b.py"}, {"c.py", "d.py", "e.py"}]
+
+    # A new file only moves files next to the boundaries
+    costs = {f"{index:03}.py": 1 for index in range(100)}
+    shards = [get_shard(costs, index, 4) for index in range(1, 5)]
+    costs["050a.py"] = 1
+    moved = sum(
+        len(shard ^ get_shard(costs, index, 4)) for index, shard in enumerate(shards, 1)
+    )
+    assert moved <= 6
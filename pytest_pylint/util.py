@@ -2,14 +2,81 @@
 """
 Utility functions for gathering files, etc.
 """
+import ast
+import hashlib
 import re
+import subprocess
+import sys
+from collections import defaultdict
 from os import sep
+from pathlib import Path
 
 
 class PyLintException(Exception):
     """Exception to raise if a file has a specified pylint error"""
 
 
+class LintMessage:
+    """
+    Compact, serializable stand-in for a pylint ``Message``.
+
+    It exposes the same attributes and ``format`` method so it can be stored
+    in the pytest cache and reported exactly like a freshly linted message.
+    """
+
+    __slots__ = (
+        "msg_id",
+        "symbol",
+        "msg",
+        "C",
+        "category",
+        "confidence",
+        "abspath",
+        "path",
+        "module",
+        "obj",
+        "line",
+        "column",
+        "end_line",
+        "end_column",
+    )
+    # Fields repeated by many messages, which then share the same strings
+    interned = (
+        "msg_id",
+        "symbol",
+        "C",
+        "category",
+        "confidence",
+        "abspath",
+        "path",
+        "module",
+        "obj",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            value = fields.get(name)
+            if name in self.interned and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, name, value)
+
+    @classmethod
+    def from_message(cls, message):
+        """Build from a pylint ``Message``"""
+        fields = {name: getattr(message, name, None) for name in cls.__slots__}
+        # Confidence is a namedtuple in pylint, only its name is serializable
+        fields["confidence"] = getattr(message.confidence, "name", message.confidence)
+        return cls(**fields)
+
+    def to_dict(self):
+        """Return the fields as a JSON serializable dictionary"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def format(self, template):
+        """Format the message according to the given template."""
+        return template.format(**self.to_dict())
+
+
 def get_rel_path(path, parent_path):
     """
     Give the path to object relative to ``parent_path``.
@@ -23,11 +90,193 @@ def get_rel_path(path, parent_path):
     return rel_path
 
 
+def get_file_hash(path):
+    """Give the hex digest of the contents of the file at ``path``."""
+    with open(path, "rb") as f_p:
+        return hashlib.sha1(f_p.read()).hexdigest()
+
+
+def get_changed_files(ref, cwd):
+    """
+    Give the paths, relative to ``cwd``, of the files in the git repository
+    at ``cwd`` that differ from ``ref`` or are untracked.
+
+    :raises subprocess.CalledProcessError: if git fails, e.g. for an
+        unknown ``ref``
+    """
+    changed = set()
+    for command in (
+        ["diff", "--name-only", "--relative", "-z", ref, "--"],
+        ["ls-files", "--others", "--exclude-standard", "-z"],
+    ):
+        output = subprocess.run(
+            ["git", *command], cwd=cwd, check=True, capture_output=True, text=True
+        ).stdout
+        changed.update(str(Path(path)) for path in output.split("\0") if path)
+    return changed
+
+
+def schedule_batches(costs, batch_cost, max_files=None):
+    """
+    Split files into batches to lint, longest running first.
+
+    Files estimated to cost at least ``batch_cost`` are linted on their own
+    while smaller ones are grouped until a batch costs about ``batch_cost``,
+    or holds ``max_files`` files. Running the longest jobs first keeps
+    workers from idling at the end.
+
+    :param dict costs: estimated lint cost by file
+    """
+    batches = []
+    batch = []
+    batch_total = 0
+    for key in sorted(costs, key=lambda key: (-costs[key], key)):
+        if costs[key] >= batch_cost:
+            batches.append([key])
+            continue
+        batch.append(key)
+        batch_total += costs[key]
+        if batch_total >= batch_cost or len(batch) == max_files:
+            batches.append(batch)
+            batch = []
+            batch_total = 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def get_shard(costs, index, count):
+    """
+    Give the files of shard ``index`` out of ``count``, counting from 1.
+
+    Files are sorted by path and cut into contiguous ranges of about the same
+    cost, so every node computes the same shards from the same tree and a new
+    file only moves files next to the boundaries between shards.
+
+    :param dict costs: lint cost by file, which must not depend on the node
+    """
+    total = sum(costs.values()) or 1
+    shard = set()
+    done = 0
+    for key in sorted(costs):
+        # A file belongs to the shard holding the middle of its cost
+        if int(count * (done + costs[key] / 2) / total) == index - 1:
+            shard.add(key)
+        done += costs[key]
+    return shard
+
+
 def should_include_file(path, ignore_list, ignore_patterns=None):
     """Checks if a file should be included in the collection."""
-    if ignore_patterns:
-        for pattern in ignore_patterns:
-            if re.match(pattern, path):
-                return False
-    parts = path.split(sep)
-    return not set(parts) & set(ignore_list)
+    return FileFilter(ignore_list, ignore_patterns).includes(path)
+
+
+class FileFilter:
+    """
+    Decide which files to include like :func:`should_include_file`, with the
+    ignore patterns compiled once and the ignored directories remembered, so
+    checking each file of a large tree is cheap.
+    """
+
+    def __init__(self, ignore_list, ignore_patterns=None):
+        self.ignore_list = frozenset(ignore_list)
+        self.ignore_patterns = [
+            re.compile(pattern) for pattern in ignore_patterns or ()
+        ]
+        self.ignored_dirs = {"": False}
+
+    def includes(self, path):
+        """Tell whether the file at the relative ``path`` is included"""
+        dir_path, _, name = path.rpartition(sep)
+        if name in self.ignore_list or self.ignores_dir(dir_path):
+            return False
+        return not any(pattern.match(path) for pattern in self.ignore_patterns)
+
+    def ignores_dir(self, dir_path):
+        """Tell whether all the files in the relative ``dir_path`` are ignored"""
+        ignored = self.ignored_dirs.get(dir_path)
+        if ignored is None:
+            parent, _, name = dir_path.rpartition(sep)
+            ignored = name in self.ignore_list or self.ignores_dir(parent)
+            self.ignored_dirs[dir_path] = ignored
+        return ignored
+
+
+def get_module_names(rel_path):
+    """
+    Give the dotted module names a file could be imported as.
+
+    The import root of a file isn't known, so every suffix of its dotted path
+    is a candidate, e.g. ``a/b/c.py`` gives ``a.b.c``, ``b.c`` and ``c``.
+    """
+    parts = rel_path[: -len(".py")].split(sep)
+    if parts[-1] == "__init__":
+        parts.pop()
+    return [".".join(parts[index:]) for index in range(len(parts))]
+
+
+def get_imported_modules(source, rel_path):
+    """
+    Give the dotted names of all modules imported by ``source``.
+
+    Parent packages and the names imported by ``from`` imports are included
+    as they may be modules themselves. Relative imports are made absolute
+    using the location of the file at ``rel_path``.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+
+    package = rel_path.split(sep)[:-1]
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = package[: len(package) - node.level + 1]
+                if node.module:
+                    base = base + node.module.split(".")
+            else:
+                base = node.module.split(".")
+            modules = [".".join(base + [alias.name]) for alias in node.names]
+            modules.append(".".join(base))
+        else:
+            continue
+
+        for module in modules:
+            parts = module.split(".")
+            names.update(".".join(parts[:index]) for index in range(1, len(parts) + 1))
+    names.discard("")
+    return sorted(names)
+
+
+def get_dependents(changed, imports):
+    """
+    Give the files that directly or indirectly import any of ``changed``.
+
+    :param changed: relative paths of changed (or removed) files
+    :param imports: mapping of relative path to the module names it imports,
+        every path that may be part of the result or of ``changed`` must be
+        a key.
+    """
+    modules = defaultdict(set)
+    for rel_path in imports:
+        for name in get_module_names(rel_path):
+            modules[name].add(rel_path)
+
+    importers = defaultdict(set)
+    for rel_path, names in imports.items():
+        for name in names:
+            for imported in modules.get(name, ()):
+                importers[imported].add(rel_path)
+
+    dependents = set()
+    pending = list(changed)
+    while pending:
+        for importer in importers[pending.pop()]:
+            if importer not in dependents and importer not in changed:
+                dependents.add(importer)
+                pending.append(importer)
+    return dependents